@@ -3,14 +3,18 @@ from pathlib import Path
 import dash
 from dash import dcc, dash_table
 import dash_bootstrap_components as dbc
-from flask import send_from_directory
 import pollination_dash_io
 
 from containers import logo_title, info_box, hello_user, create_radio_container, \
     select_pollination_project, select_sample_project, create_color_by_container, \
-    create_images_container
-from config import base_path
-from samples import load_sample_project
+    create_images_container, create_images_grid_page, create_import_progress
+from config import assets_path, base_path, thumbnail_path, table_page_size
+from downloader import fetch_on_demand
+from helper import remove_stale_temp_files
+from metrics import init_metrics
+from samples import load_sample_layout
+from serialization import init_serialization
+from serving import init_compression, init_layout_cache, send_cached
 
 # import callback functions
 from callbacks import color, image, pollination, records, sample, sort, table
@@ -23,47 +27,84 @@ app = dash.Dash(
 )
 app.title = 'Design Explorer'
 server = app.server
+# latency and payload size of the callbacks, served on /metrics
+init_metrics(server)
+# the responses are serialized with orjson and the large ones are compressed
+init_serialization()
+init_compression(server)
+# the thumbnails and the sidecars of the samples that a worker was writing when
+# it was killed; the imports remove their own
+remove_stale_temp_files(thumbnail_path, recursive=False)
+remove_stale_temp_files(assets_path.joinpath('samples'))
 
 # this will set an alternative folder for images (alternative to "/assets")
 @server.route('/pollination/<path:path>')
 def serve_image(path):
     directory = Path(__file__).parent.joinpath('pollination')
-    return send_from_directory(directory, path)
+    # images of a Pollination project are downloaded the first time
+    fetch_on_demand(path)
+    return send_cached(directory, path)
+
+# thumbnails of the images grid, the name of a thumbnail is its content hash
+@server.route('/thumbnails/<path:path>')
+def serve_thumbnail(path):
+    return send_cached(thumbnail_path, path, immutable=True)
 
 api_key = pollination_dash_io.ApiKey()
 
-parameters, color_by, fig, images_grid_children, sort_by, project_folder, \
-df_records, df, labels, img_column, columns = load_sample_project(
-    'daylight-factor'
-)
 
-app.layout = dbc.Container([
-    logo_title(app),
-    info_box(),
-    hello_user(api_key, base_path),
-    create_radio_container(),
-    select_sample_project(),
-    select_pollination_project(),
-    create_color_by_container(parameters, color_by),
-    dcc.Graph(id='parallel-coordinates', figure=fig),
-    create_images_container(images_grid_children, parameters, sort_by),
-    dcc.Store(id='project-folder', data=project_folder),
-    dcc.Loading(children=[dcc.Store(id='df', data=df_records)],
-        className='custom-spinner', type='default', fullscreen=True),
-    dcc.Store(id='df-columns', data=df.columns),
-    dcc.Store(id='labels', data=labels),
-    dcc.Store(id='parameters', data=parameters),
-    dcc.Store(id='img-column', data=img_column),
-    dcc.Store(id='active-filters', data={}),
-    dcc.Store(id='active-records', data=df_records),
-    dcc.Store(id='parallel-coordinates-figure-highlight', data={}),
-    dcc.Store(id='parallel-coordinates-figure', data=fig),
-    dash_table.DataTable(
-        id='table', data=df.to_dict('records'),
-        columns=columns,
-        style_table={'padding': '20px'},
-        sort_action='native'),
-], style={'padding': '20px'}, fluid=True)
+def serve_layout():
+    """Create the layout of the app with a sample project.
+
+    The sample is loaded on the first request, not when the app starts."""
+    sample = load_sample_layout('daylight-factor')
+    images_grid_page = None
+    if sample.images_grid:
+        images_grid_page = create_images_grid_page(
+            sample.images_grid['images'], sample.images_grid['border_colors'],
+            sample.project_folder, sample.images_grid['thumbnails'])
+
+    return dbc.Container([
+        logo_title(app),
+        info_box(),
+        hello_user(api_key, base_path),
+        create_radio_container(),
+        select_sample_project(),
+        select_pollination_project(),
+        create_import_progress(),
+        create_color_by_container(sample.parameters, sample.color_by),
+        dcc.Graph(id='parallel-coordinates', figure=sample.figure),
+        create_images_container(
+            images_grid_page, sample.parameters, sample.sort_by,
+            sample.row_count, sample.images_grid_rows),
+        dcc.Store(id='project-folder', data=sample.project_folder),
+        dcc.Loading(
+            children=[dcc.Store(id='dataset-id', data=sample.dataset_id)],
+            className='custom-spinner', type='default', fullscreen=True),
+        dcc.Store(id='df-columns', data=sample.df_columns),
+        dcc.Store(id='labels', data=sample.labels),
+        dcc.Store(id='parameters', data=sample.parameters),
+        dcc.Store(id='img-column', data=sample.img_column),
+        dcc.Store(id='active-filters', data={}),
+        dcc.Store(id='active-records', data=None),
+        dash_table.DataTable(
+            id='table', data=sample.table_data,
+            columns=sample.columns,
+            style_table={'padding': '20px'},
+            page_action='custom',
+            page_current=0,
+            page_size=table_page_size,
+            page_count=table.table_page_count(sample.row_count),
+            sort_action='custom',
+            sort_mode='single',
+            sort_by=[]),
+    ], style={'padding': '20px'}, fluid=True)
+
+
+app.layout = serve_layout
+# the layout is the same for every visit, so it is serialized once
+init_layout_cache(
+    server, app.config.routes_pathname_prefix + '_dash-layout', app.serve_layout)
 
 api_key.create_api_key_callback(
     app=app,
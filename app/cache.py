@@ -0,0 +1,61 @@
+"""Module for the cache that is shared by the worker processes of the app.
+
+The cache is a diskcache.Cache, i.e., an SQLite database in the cache folder,
+that every worker opens. It holds small values that one worker computes and
+the others need, e.g., the remote folders of the projects that were imported
+from Pollination. The remote folders have the API key of the user who imported
+the project, so the cache folder can only be read by the user of the app.
+"""
+import threading
+from pathlib import Path
+from typing import Any, Hashable, Optional, Tuple
+
+import diskcache
+
+from config import cache_path
+
+_cache = None
+_lock = threading.Lock()
+
+
+def private_folder(path: Path) -> Path:
+    """Create a folder in the cache folder that can only be read by the user of
+    the app. The cache folder and the folder are made private if they already
+    exist, e.g., because they were created by an older version."""
+    for folder in (cache_path, path):
+        folder.mkdir(mode=0o700, parents=True, exist_ok=True)
+        folder.chmod(0o700)
+    return path
+
+
+def _get_cache() -> diskcache.Cache:
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = diskcache.Cache(
+                private_folder(cache_path.joinpath('shared')).as_posix())
+        return _cache
+
+
+def cache_get(key: Hashable, default: Any = None) -> Any:
+    """Get a value from the shared cache."""
+    return _get_cache().get(key, default)
+
+
+def cache_get_expiring(key: Hashable) -> Tuple[Any, Optional[float]]:
+    """Get a value and the time it expires, in seconds since the epoch, from
+    the shared cache. (None, None) is returned if the key is not in the
+    cache."""
+    return _get_cache().get(key, expire_time=True)
+
+
+def cache_set(key: Hashable, value: Any, expire: Optional[float] = None):
+    """Set a value in the shared cache. The value expires after expire seconds
+    if expire is not None."""
+    _get_cache().set(key, value, expire=expire)
+
+
+def cache_touch(key: Hashable, expire: Optional[float] = None):
+    """Set the time a value in the shared cache expires to expire seconds from
+    now."""
+    _get_cache().touch(key, expire=expire)
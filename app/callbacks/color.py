@@ -2,7 +2,10 @@
 import dash
 from dash import Patch, ALL, ctx
 from dash.dependencies import Input, Output, State
-import pandas as pd
+
+from colors import column_range
+from encoding import typed_array
+from registry import get_project
 
 
 @dash.callback(
@@ -10,25 +13,32 @@ import pandas as pd
      Output('color-by-column', 'data'),
      Output('color-by-dropdown', 'label')],
     [Input({'color_by_dropdown': ALL}, 'n_clicks'),
-     State('df', 'data'),
+     State('dataset-id', 'data'),
      State('labels', 'data'),
      State('parallel-coordinates', 'figure')],
     prevent_initial_call=True
 )
-def update_color_by(n_clicks, df_records, labels, figure):
+def update_color_by(n_clicks, dataset_id, labels, figure):
     """If a click is registered in the color by dropdown, the figure is updated
     in parallel-coordinates, the data is updated in color-by-column, and the
     label is updated in color-by-dropdown."""
     if all(v is None for v in n_clicks):
         return (dash.no_update,) * 3
 
-    dff = pd.DataFrame.from_records(df_records)
+    bundle = get_project(dataset_id)
     color_by = ctx.triggered_id.color_by_dropdown
 
     if color_by:
         new_fig = Patch()
         new_fig['data'][0]['dimensions'] = figure['data'][0]['dimensions']
-        new_fig['data'][0]['line']['color'] = dff[color_by]
+        minimum, maximum = column_range(dataset_id, color_by)
+        colors = bundle.frame[color_by].to_numpy()
+        if bundle.figure_rows is not None:
+            colors = colors[bundle.figure_rows]
+        new_fig['data'][0]['line']['color'] = typed_array(colors)
+        # same range as the borders of the images in the grid
+        new_fig['layout']['coloraxis']['cmin'] = minimum
+        new_fig['layout']['coloraxis']['cmax'] = maximum
         return new_fig, color_by, labels[color_by]
     else:
         new_fig = Patch()
@@ -1,119 +1,299 @@
 """Module for image callbacks."""
-from pathlib import Path
 import dash
-from dash import html, ALL, ctx
+from dash import html, ALL, Patch, ctx
 from dash.dependencies import Input, Output, State
-import pandas as pd
-import plotly.express as px
 import numpy as np
 
+from colors import column_colors, default_color
+from config import images_page_size
+from containers import create_images_grid_children, images_pagination_state, \
+    images_count_text
+from encoding import decode_rows
+from indexes import order_rows
+from registry import get_dataset, get_image_row, get_indexes
+from serving import versioned_src
+from thumbnails import get_thumbnails
+
+
+def images_sort_values(dff, rows, labels):
+    """Get the values of the sortable columns of rows.
+
+    The values are only returned if all the rows fit on one page, so the images
+    grid can be sorted in the browser. Otherwise None is returned and the grid
+    is sorted on the server.
+    """
+    if len(rows) > images_page_size:
+        return None
+    values = {}
+    for label in labels:
+        column = dff[label].iloc[rows]
+        values[label] = column.astype(object).where(column.notna(), None).tolist()
+    return {
+        'rows': np.asarray(rows).tolist(),
+        'values': values
+    }
+
+
+def images_grid_patch(previous_rows, page_rows, create_children):
+    """Get the change of the images grid from previous_rows to page_rows.
+
+    The children of the rows that stay on the page are kept. The children of
+    the rows that are no longer on the page are removed and the children of
+    the new rows are inserted, so the size of the change is proportional to the
+    number of rows that changed. If the rows that stay change their order, e.g.,
+    after a change of the sort, all the children are sent again, unless the
+    order is reversed. All the children are also sent again if more than half
+    of the page changed, since the Patch would then be larger than the page.
+
+    Args:
+        previous_rows: The row positions that are in the grid.
+        page_rows: The row positions of the new page.
+        create_children: A function that creates the children of rows.
+
+    Returns:
+        A Patch, or the list of all the children if nothing can be kept.
+    """
+    page_rows = list(page_rows)
+    if len(page_rows) > 1 and previous_rows == page_rows[::-1]:
+        patch = Patch()
+        patch.reverse()
+        return patch
+
+    page_set, previous_set = set(page_rows), set(previous_rows)
+    kept = [row for row in previous_rows if row in page_set]
+    if not kept or kept != [row for row in page_rows if row in previous_set]:
+        return create_children(page_rows)
+
+    removed = [i for i, row in enumerate(previous_rows) if row not in page_set]
+    added = [i for i, row in enumerate(page_rows) if row not in previous_set]
+    if len(removed) + len(added) > len(page_rows) // 2:
+        return create_children(page_rows)
+
+    patch = Patch()
+    for i in reversed(removed):
+        del patch[i]
+    for i, child in zip(added, create_children([page_rows[i] for i in added])):
+        patch.insert(i, child)
+    return patch
+
+
+def border_colors_patch(dataset_id, rows, color_by_column):
+    """Get a Patch that only updates the border colors of the images grid."""
+    colors = images_border_colors(dataset_id, rows, color_by_column)
+    patch = Patch()
+    for i, color in enumerate(colors):
+        patch[i]['props']['children']['props']['style']['border-color'] = color
+    return patch
+
+
+def images_border_colors(dataset_id, rows, color_by_column):
+    """Get the border colors of the images of rows."""
+    if color_by_column:
+        return column_colors(dataset_id, color_by_column)[rows]
+    return [default_color] * len(rows)
+
 
 @dash.callback(
-    Output('images-grid', 'children', allow_duplicate=True),
+    [Output('images-grid', 'children', allow_duplicate=True),
+     Output('images-pagination', 'active_page'),
+     Output('images-pagination', 'max_value'),
+     Output('images-pagination', 'style'),
+     Output('images-count', 'children'),
+     Output('images-grid-values', 'data'),
+     Output('images-grid-rows', 'data')],
     [Input('active-records', 'data'),
-     State('df', 'data'),
+     State('dataset-id', 'data'),
      Input('color-by-column', 'data'),
-     Input('sort-by-column', 'data'),
-     Input('sort-ascending', 'data'),
+     Input('images-sort', 'data'),
+     Input('images-pagination', 'active_page'),
+     State('sort-by-column', 'data'),
+     State('sort-ascending', 'data'),
      State('img-column', 'data'),
-     State('project-folder', 'data')],
+     State('project-folder', 'data'),
+     State('labels', 'data'),
+     State('images-grid-rows', 'data')],
     prevent_initial_call=True,
 )
 def update_images_grid(
-        active_records, df_records, color_by_column, sort_by_column,
-        sort_ascending, img_column, project_folder):
+        active_records, dataset_id, color_by_column, images_sort, active_page,
+        sort_by_column, sort_ascending, img_column, project_folder, labels,
+        images_grid_rows):
     """If the data in active-records is changed, the children will be updated
     in images-grid.
     
-    The images-grid is a grid showing all the images of the selected filters in
-    the parallel coordinate plot.
-
-    The data coming from table is a list. Here is an example:
-    [
-        {'in:X': 1, 'in:Y': 4, 'in:Z': 3.6, 'img:Perspective': 'X_1_Y_4_Z_3.6.png'},
-        {'in:X': 2, 'in:Y': 4, 'in:Z': 3.6, 'img:Perspective': 'X_2_Y_4_Z_3.6.png'}
-    ]
+    The images-grid is a grid showing the images of the selected filters in
+    the parallel coordinate plot. Only the images of the active page are
+    rendered. The page is reset to the first page if the active records or the
+    sort are changed.
+
+    The data coming from active-records is the row positions in the dataset,
+    encoded with encoding.encode_rows, or None if all rows are active.
+
+    images-grid-rows has the row positions that are in the grid, so only the
+    change of the grid is sent as a Patch. A change of color-by-column only
+    updates the border colors.
+
+    If all the images fit on one page, a change of the sort is handled in the
+    browser with the values in images-grid-values. Otherwise the sort is sent
+    to images-sort and the grid is sorted here.
     """
     if img_column is None:
-        return []
-    images_div = []
-    if color_by_column:
-        dff = pd.DataFrame.from_records(df_records)
-        minimum, maximum = dff[color_by_column].min(
-        ), dff[color_by_column].max()
-    border_color = '#636EFA'
-    if sort_by_column:
-        dff = pd.DataFrame.from_records(active_records)
-        sorted_df = dff.sort_values(
-            by=sort_by_column, ascending=sort_ascending)
-        active_records = sorted_df.to_dict('records')
-    project_folder = Path(project_folder)
-    for d in active_records:
-        if color_by_column:
-            samplepoints = np.interp(
-                d[color_by_column],
-                [minimum, maximum],
-                [0, 1])
-            border_color = px.colors.sample_colorscale(
-                'plasma', samplepoints=samplepoints
-            )[0]
-        src = project_folder.joinpath(d[img_column])
-        image = html.Div(
-            html.Img(src=src.as_posix(),
-                     id={'image': f'{d[img_column]}'},
-                     className='image-grid',
-                     style={'border-color': border_color}
-                     ),
-            style={
-                'aspect-ratio': '1',
-                'width': '100%',
-                'height': '100%',
-                'position': 'relative',
-                'display': 'flex',
-                'align-items': 'center',
-                'justify-content': 'center',
-            }
-        )
-        images_div.append(image)
+        return [], 1, 1, {'display': 'none'}, images_count_text(0), None, None
+    dff = get_dataset(dataset_id)
+    indexes = get_indexes(dataset_id)
+    rows = order_rows(dff, indexes, sort_by_column, decode_rows(active_records),
+                      ascending=sort_ascending)
 
-    return images_div
+    total = len(rows)
+    max_value, pagination_style = images_pagination_state(total)
+    if ctx.triggered_id in ('active-records', 'images-sort') or not active_page:
+        active_page = 1
+    active_page = min(active_page, max_value)
+    start = (active_page - 1) * images_page_size
+    page_rows = rows[start:start + images_page_size].tolist()
 
+    def create_children(rows):
+        images = dff[img_column].to_numpy()[rows]
+        thumbnails = get_thumbnails(dataset_id, project_folder, images)
+        return create_images_grid_children(
+            images,
+            images_border_colors(dataset_id, rows, color_by_column),
+            project_folder, thumbnails)
 
-@dash.callback(
-    [Output('selected-image', 'src', allow_duplicate=True),
-     Output('selected-image-container', 'style', allow_duplicate=True),
-     Output('images-grid', 'style', allow_duplicate=True)],
-    [Input('selected-image-data', 'data'),
-     State('img-column', 'data'),
-     State('project-folder', 'data')],
-    prevent_initial_call=True,
-)
-def update_selected_image_table(
-        selected_image_data, img_column, project_folder):
-    """If the data in selected-image-table is changed.
-    
-    The src of selected-image is taken from selected-image-table. The styles of
-    selected-image-container and images-grid are also updated."""
-    if selected_image_data is None:
-        return (dash.no_update,) * 3
+    previous_rows = None
+    if images_grid_rows and images_grid_rows['dataset_id'] == dataset_id:
+        previous_rows = images_grid_rows['rows']
+    if previous_rows is None:
+        images_div = create_children(page_rows)
+    elif ctx.triggered_id == 'color-by-column' and previous_rows == page_rows:
+        images_div = border_colors_patch(dataset_id, page_rows, color_by_column)
+    else:
+        images_div = images_grid_patch(previous_rows, page_rows, create_children)
+
+    return (images_div, active_page, max_value, pagination_style,
+            images_count_text(total),
+            images_sort_values(dff, rows, labels),
+            {'dataset_id': dataset_id, 'rows': page_rows})
 
-    project_folder = Path(project_folder)
-    src = project_folder.joinpath(
-        selected_image_data[0][img_column]).as_posix()
 
-    selected_image_container_style = {
-        'width': '75%'
+# The initial layout only has the images, the srcs and the border colors of
+# the first page in images-grid-page, and the children of images-grid are
+# created from it in the browser. They must match create_images_grid_children.
+dash.clientside_callback(
+    """
+    function create_images_grid(grid_page) {
+        if (!grid_page) {
+            return window.dash_clientside.no_update;
+        }
+        return grid_page.images.map((image, i) => ({
+            type: 'Div',
+            namespace: 'dash_html_components',
+            props: {
+                className: 'image-grid-item',
+                children: {
+                    type: 'Img',
+                    namespace: 'dash_html_components',
+                    props: {
+                        src: grid_page.srcs[i],
+                        id: {image: image},
+                        className: 'image-grid',
+                        style: {'border-color': grid_page.colors[i]}
+                    }
+                }
+            }
+        }));
     }
+    """,
+    Output('images-grid', 'children', allow_duplicate=True),
+    Input('images-grid-page', 'data'),
+    prevent_initial_call='initial_duplicate'
+)
 
-    images_grid_style = {
-        'grid-template-columns': 'repeat(auto-fill, minmax(10%, 1fr))',
-        'width': '25%'
+
+# If all the images fit on one page, a change of sort-by-column or
+# sort-ascending reorders the children of images-grid with the values in
+# images-grid-values. Otherwise the sort is sent to images-sort, which updates
+# the images grid on the server. Missing values are sorted last.
+dash.clientside_callback(
+    """
+    function sort_images_grid(
+            sort_by_column, sort_ascending, children, grid_values, grid_rows) {
+        const no_update = window.dash_clientside.no_update;
+        if (!grid_values || !children || !grid_rows ||
+                !(sort_by_column in grid_values.values)) {
+            return [no_update, no_update,
+                    {column: sort_by_column, ascending: sort_ascending}];
+        }
+        const rows = grid_values.rows;
+        const values = grid_values.values[sort_by_column];
+        const direction = sort_ascending ? 1 : -1;
+        const order = rows.map((row, i) => i);
+        order.sort((a, b) => {
+            const x = values[a], y = values[b];
+            if (x === null || y === null) {
+                return (x === null) - (y === null);
+            }
+            // ties are kept in the order of the rows like on the server
+            return direction * ((x > y) - (x < y) || rows[a] - rows[b]);
+        });
+        // the children are in the order of the rows in images-grid-rows
+        const children_by_row = {};
+        grid_rows.rows.forEach((row, i) => { children_by_row[row] = children[i]; });
+        const sorted_rows = order.map(i => rows[i]);
+        const sorted_children = sorted_rows.map(row => children_by_row[row]);
+        return [sorted_children,
+                {dataset_id: grid_rows.dataset_id, rows: sorted_rows},
+                no_update];
     }
+    """,
+    [Output('images-grid', 'children', allow_duplicate=True),
+     Output('images-grid-rows', 'data', allow_duplicate=True),
+     Output('images-sort', 'data')],
+    [Input('sort-by-column', 'data'),
+     Input('sort-ascending', 'data'),
+     State('images-grid', 'children'),
+     State('images-grid-values', 'data'),
+     State('images-grid-rows', 'data')],
+    prevent_initial_call=True
+)
+
 
-    return src, selected_image_container_style, images_grid_style
+# If the data in selected-image-data is changed, the styles of
+# selected-image-container and images-grid are updated.
+dash.clientside_callback(
+    """
+    function update_selected_image_table(selected_image_data) {
+        const no_update = window.dash_clientside.no_update;
+        if (selected_image_data === null || selected_image_data === undefined) {
+            return [no_update, no_update];
+        }
+        const selected_image_container_style = {'width': '75%'};
+        const images_grid_style = {
+            'grid-template-columns': 'repeat(auto-fill, minmax(10%, 1fr))',
+            'width': '25%'
+        };
+        return [selected_image_container_style, images_grid_style];
+    }
+    """,
+    [Output('selected-image-container', 'style', allow_duplicate=True),
+     Output('images-grid', 'style', allow_duplicate=True)],
+    Input('selected-image-data', 'data'),
+    prevent_initial_call=True
+)
 
 
-@dash.callback(
+# If a click is registered on selected-image, everything related to the
+# selected-image is reset. The style of images-grid is also reset to its
+# original state.
+dash.clientside_callback(
+    """
+    function update_click_selected_image(n_clicks) {
+        if (n_clicks === null || n_clicks === undefined) {
+            return Array(6).fill(window.dash_clientside.no_update);
+        }
+        return [null, null, null, null, {}, {}];
+    }
+    """,
     [Output('selected-image', 'src', allow_duplicate=True),
      Output('selected-image', 'n_clicks', allow_duplicate=True),
      Output('selected-image-data', 'data', allow_duplicate=True),
@@ -123,48 +303,62 @@ def update_selected_image_table(
     Input('selected-image', 'n_clicks'),
     prevent_initial_call=True
 )
-def update_click_selected_image(n_clicks):
-    """If a click is registered on selected-image.
-    
-    When this happens we reset everything related to the selected-image. The
-    style of images-grid is also reset to its original state."""
-    if n_clicks is not None:
-        selected_image_container_style = {}
-        images_grid_style = {}
-        return None, None, None, None, selected_image_container_style, images_grid_style
+
+
+# If a click is registered in any of the images in images-grid, the id of the
+# image is updated in clicked-image, so only the id is sent to the server.
+dash.clientside_callback(
+    """
+    function update_clicked_image(n_clicks) {
+        const triggered_id = window.dash_clientside.callback_context.triggered_id;
+        if (n_clicks.every(v => v === null || v === undefined) || !triggered_id) {
+            return window.dash_clientside.no_update;
+        }
+        return triggered_id.image;
+    }
+    """,
+    Output('clicked-image', 'data'),
+    Input({'image': ALL}, 'n_clicks'),
+    prevent_initial_call=True
+)
 
 
 @dash.callback(
     [Output('selected-image-data', 'data', allow_duplicate=True),
-     Output('selected-image-info', 'children', allow_duplicate=True)],
-    [Input({'image': ALL}, 'n_clicks'),
-     State('df', 'data'),
+     Output('selected-image-info', 'children', allow_duplicate=True),
+     Output('selected-image', 'src', allow_duplicate=True)],
+    [Input('clicked-image', 'data'),
+     State('dataset-id', 'data'),
      State('labels', 'data'),
      State('img-column', 'data'),
-     State('parameters', 'data')],
+     State('parameters', 'data'),
+     State('project-folder', 'data')],
     prevent_initial_call=True
 )
 def update_clicked_image_grid(
-        n_clicks, df_records, labels, img_column, parameters):
-    """If a click is registered in any of the images in images-grid, the data is
-    updated in selected-image-table."""
-    if all(item is None for item in n_clicks):
-        # no clicks, no update
-        return (dash.no_update,) * 2
-    # get the clicked image
-    image_id = ctx.triggered_id.image
-    dff = pd.DataFrame.from_records(df_records)
-    selected_df = dff.loc[dff[img_column] == image_id]
+        image_id, dataset_id, labels, img_column, parameters, project_folder):
+    """If the data in clicked-image is changed, the data is updated in
+    selected-image-data and the src is updated in selected-image.
+
+    The record of the image is found with the index from image to row of the
+    dataset. The src has the content hash of the image as version, so the image
+    can be cached by the browser."""
+    if image_id is None:
+        return (dash.no_update,) * 3
+    row = get_image_row(dataset_id, img_column, image_id)
+    if row is None:
+        return (dash.no_update,) * 3
+    record = get_dataset(dataset_id).iloc[row].to_dict()
     select_image_info = []
-    record = selected_df.to_dict('records')
     for label in labels:
         select_image_info.append(
             html.Div(
                 children=[html.Span(
                     f'{parameters[label]["display_name"]}: ',
                     className='label-bold'),
-                    f'{record[0][label]}']))
-    return record, select_image_info
+                    f'{record[label]}']))
+    src = versioned_src(project_folder, image_id)
+    return [record], select_image_info, src
 
 
 @dash.callback(
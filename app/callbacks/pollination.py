@@ -1,19 +1,21 @@
 """Module for Pollination callbacks."""
 import base64
-import zipfile
-from io import BytesIO
 from pathlib import Path
 import dash
 from dash.dependencies import Input, Output, State
 from dash.exceptions import PreventUpdate
-import pandas as pd
-import plotly.express as px
 import pollination_dash_io
-from pollination_io.api.client import ApiClient
 
 from containers import create_color_by_children, create_sort_by_children
-from helper import process_dataframe
-from config import pollination_path, base_path
+from downloader import download_artifacts, register_remote_folder, RemoteFolder
+from helper import remove_stale_temp_files
+from imports import import_digest, read_manifest, write_manifest, \
+    extract_zip, write_file, manifest_folder
+from config import pollination_path, base_path, prefetch_images
+from jobs import background_manager
+from locks import file_lock
+from registry import get_project, load_project
+from thumbnails import get_thumbnails
 
 
 @dash.callback(
@@ -73,156 +75,151 @@ def update_select_account_container(value, apiKey):
 
 
 @dash.callback(
-    [Output('project-folder', 'data', allow_duplicate=True),
-     Output('df', 'data', allow_duplicate=True),
-     Output('active-records', 'data', allow_duplicate=True),
-     Output('active-filters', 'data', allow_duplicate=True),
-     Output('df-columns', 'data', allow_duplicate=True),
-     Output('labels', 'data', allow_duplicate=True),
-     Output('img-column', 'data', allow_duplicate=True),
-     Output('parameters', 'data', allow_duplicate=True),
-     Output('parallel-coordinates', 'figure', allow_duplicate=True),
-     Output('sort-by', 'children', allow_duplicate=True),
-     Output('color-by', 'children', allow_duplicate=True),
-     Output('table', 'columns', allow_duplicate=True),
-     Output('selected-image-info', 'children', allow_duplicate=True),
-     Output('selected-image-container', 'style', allow_duplicate=True),
-     Output('images-grid', 'style', allow_duplicate=True),
-     Output('images-container', 'style')],
+    Output('pollination-import', 'data'),
     [Input('select-artifact', 'value'),
      Input('select-artifact', 'name'),
      Input('select-artifact', 'key'),
      State('select-project', 'project'),
      State('auth-user', 'apiKey')],
+    background=True,
+    manager=background_manager,
+    running=[(Output('import-progress-container', 'style'),
+              {'display': 'flex'}, {'display': 'none'}),
+             (Output('import-cancel', 'disabled'), False, True)],
+    progress=[Output('import-progress', 'value'),
+              Output('import-status', 'children')],
+    cancel=[Input('import-cancel', 'n_clicks')],
     prevent_initial_call=True
 )
-def load_project_from_pollination(value, name, key, project, api_key):
+def import_project_from_pollination(set_progress, value, name, key, project,
+                                    api_key):
+    """If an artifact is selected, the artifact is imported as a background job
+    and the dataset id is updated in pollination-import.
+
+    The job reports its progress to import-progress and import-status and can
+    be cancelled with import-cancel. It runs in a separate process, so the
+    project is loaded again from its files by the worker that applies it.
+    """
     if value is None or name is None or key is None:
         raise PreventUpdate
 
-    bytes_value = base64.b64decode(value)
     file = Path(name)
+    # an artifact that was imported before is not decoded or extracted again
+    digest = import_digest(key, value)
 
     if file.suffix == '.zip':
-        zip_file_like = BytesIO(bytes_value)
         output_folder = pollination_path.joinpath(
             project['owner']['id'], project['id'], file.stem)
-        project_folder = f'pollination/{project["owner"]["id"]}/{project["id"]}/{file.stem}'
-        with zipfile.ZipFile(zip_file_like, 'r') as zip_file:
-            zip_file.extractall(output_folder)
-        csv_file = output_folder.joinpath('data.csv')
-        assert csv_file.exists(), 'File data.csv does not exists in zip file.'
-        dff = pd.read_csv(csv_file)
-        df_records = dff.to_dict('records')
-
-        labels, parameters, input_columns, output_columns, image_columns = \
-            process_dataframe(dff)
-
-        if output_columns:
-            color_by = output_columns[0]
-            sort_by = output_columns[0]
-        else:
-            color_by = input_columns[0]
-            sort_by = output_columns[0]
-
-        fig = px.parallel_coordinates(dff, color=color_by, labels=labels)
-
-        img_column = dff.filter(regex=f'^img:').columns[0]
-
-        columns = []
-        for value in parameters.values():
-            if value['type'] != 'img':
-                columns.append(
-                    {'id': value['label'],
-                     'name': value['display_name']})
-            else:
-                columns.append(
-                    {'id': value['label'],
-                     'name': value['display_name'],
-                     'hidden': True})
-
-        sort_by_children = create_sort_by_children(parameters, sort_by)
-        color_by_children = create_color_by_children(parameters, color_by)
-
-        active_filters = {}
-        selected_image_info = None
-        selected_image_container_style = {}
-        image_grid_style = {}
-
-        return (project_folder, df_records, df_records, active_filters, dff.columns,
-                labels, img_column, parameters, fig, sort_by_children,
-                color_by_children, columns, selected_image_info,
-                selected_image_container_style, image_grid_style, {})
+        # the other workers wait for the import and use it
+        with file_lock(f'import:{output_folder}'):
+            remove_stale_temp_files(output_folder)
+            remove_stale_temp_files(manifest_folder, recursive=False)
+            if read_manifest(digest, output_folder) is None:
+                content = base64.b64decode(value)
+                set_progress((10, f'Decoded {name}'))
+                files = extract_zip(content, output_folder)
+                write_manifest(digest, key, output_folder, files)
+                set_progress((25, f'Extracted {len(files)} files'))
+        csv_path = output_folder.joinpath('data.csv')
+        assert csv_path.exists(), 'File data.csv does not exists in zip file.'
     else:
         csv_pollination_folder = Path(key).parent
         output_folder = pollination_path.joinpath(
             project['owner']['id'], project['id'], csv_pollination_folder)
-        project_folder = f'pollination/{project["owner"]["id"]}/{project["id"]}/{csv_pollination_folder}'
         csv_path = output_folder.joinpath(name)
-        csv_path.parent.mkdir(parents=True, exist_ok=True)
-        bytes_value = BytesIO(bytes_value)
-        with open(csv_path, 'wb') as file:
-            file.write(bytes_value.getvalue())
-
-        dff = pd.read_csv(csv_path)
-        df_records = dff.to_dict('records')
-
-        labels, parameters, input_columns, output_columns, image_columns = \
-            process_dataframe(dff)
-
-        if output_columns:
-            color_by = output_columns[0]
-            sort_by = output_columns[0]
+        with file_lock(f'import:{csv_path}'):
+            remove_stale_temp_files(output_folder)
+            remove_stale_temp_files(manifest_folder, recursive=False)
+            if read_manifest(digest, output_folder) is None:
+                content = base64.b64decode(value)
+                set_progress((10, f'Decoded {name}'))
+                write_file(content, csv_path)
+                write_manifest(digest, key, output_folder, [name])
+                set_progress((25, f'Saved {name}'))
+
+    bundle = load_project(csv_path)
+    img_column = bundle.img_column
+    set_progress((40, f'Parsed {len(bundle.frame)} designs'))
+
+    if img_column:
+        images = bundle.frame[img_column]
+        if file.suffix == '.zip':
+            set_progress((90, 'Creating thumbnails'))
+            get_thumbnails(bundle.dataset_id, bundle.project_folder, images)
+        elif prefetch_images:
+            def on_progress(count, total):
+                set_progress((40 + 50 * count // total,
+                              f'Fetched {count} of {total} images'))
+
+            # the manifest is written under the lock of the import, so it does
+            # not race the import of the same artifact in another worker
+            with file_lock(f'import:{csv_path}'):
+                missing = [image for image in images.unique()
+                           if not output_folder.joinpath(image).is_file()]
+                if missing:
+                    download_artifacts(
+                        api_key, project['owner']['name'], project['name'],
+                        csv_pollination_folder, missing, output_folder,
+                        on_progress=on_progress)
+                    downloaded = [image for image in images.unique()
+                                  if output_folder.joinpath(image).is_file()]
+                    write_manifest(
+                        digest, key, output_folder, [name] + downloaded)
+            set_progress((90, 'Creating thumbnails'))
+            get_thumbnails(bundle.dataset_id, bundle.project_folder, images)
         else:
-            color_by = input_columns[0]
-            sort_by = output_columns[0]
+            # the images are downloaded the first time they are requested
+            register_remote_folder(
+                output_folder.relative_to(pollination_path),
+                RemoteFolder(api_key, project['owner']['name'],
+                             project['name'],
+                             csv_pollination_folder.as_posix(),
+                             images=frozenset(images.dropna().unique())))
 
-        fig = px.parallel_coordinates(dff, color=color_by, labels=labels)
+    set_progress((100, 'Done'))
+    return bundle.dataset_id
 
-        img_columns = dff.filter(regex=f'^img:').columns
-        if img_columns.empty:
-            img_column = None
-        else:
-            img_column = img_columns[0]
-
-        columns = []
-        for value in parameters.values():
-            if value['type'] != 'img':
-                columns.append(
-                    {'id': value['label'],
-                     'name': value['display_name']})
-            else:
-                columns.append(
-                    {'id': value['label'],
-                     'name': value['display_name'],
-                     'hidden': True})
-
-        sort_by_children = create_sort_by_children(parameters, sort_by)
-        color_by_children = create_color_by_children(parameters, color_by)
-
-        active_filters = {}
-        selected_image_info = None
-        selected_image_container_style = {}
-        image_grid_style = {}
-
-        if img_column:
-            client = ApiClient(host=base_path, api_token=api_key)
-            url = Path(
-                'projects', project['owner']['name'],
-                project['name'],
-                'artifacts', 'download')
-            images = dff[img_column]
-            for image in images:
-                params = {
-                    'path': csv_pollination_folder.joinpath(image).as_posix()
-                }
-                signed_url = client.get(url.as_posix(), params=params)
-                img_bytes = client.download_artifact(signed_url)
-                img_path = output_folder.joinpath(image)
-                with img_path.open('wb') as file:
-                    file.write(img_bytes.getvalue())
-
-        return (project_folder, df_records, df_records, active_filters, dff.columns,
-                labels, img_column, parameters, fig, sort_by_children,
-                color_by_children, columns, selected_image_info,
-                selected_image_container_style, image_grid_style, {})
+
+@dash.callback(
+    [Output('project-folder', 'data', allow_duplicate=True),
+     Output('dataset-id', 'data', allow_duplicate=True),
+     Output('active-records', 'data', allow_duplicate=True),
+     Output('active-filters', 'data', allow_duplicate=True),
+     Output('df-columns', 'data', allow_duplicate=True),
+     Output('labels', 'data', allow_duplicate=True),
+     Output('img-column', 'data', allow_duplicate=True),
+     Output('parameters', 'data', allow_duplicate=True),
+     Output('parallel-coordinates', 'figure', allow_duplicate=True),
+     Output('sort-by', 'children', allow_duplicate=True),
+     Output('color-by', 'children', allow_duplicate=True),
+     Output('table', 'columns', allow_duplicate=True),
+     Output('selected-image-info', 'children', allow_duplicate=True),
+     Output('selected-image-container', 'style', allow_duplicate=True),
+     Output('images-grid', 'style', allow_duplicate=True),
+     Output('images-container', 'style')],
+    Input('pollination-import', 'data'),
+    prevent_initial_call=True
+)
+def load_project_from_pollination(dataset_id):
+    """If a project is imported from Pollination, the project is loaded from
+    the registry and applied to the app."""
+    if dataset_id is None:
+        raise PreventUpdate
+    bundle = get_project(dataset_id)
+    img_column = bundle.img_column
+
+    sort_by_children = create_sort_by_children(bundle.parameters, bundle.sort_by)
+    color_by_children = create_color_by_children(
+        bundle.parameters, bundle.color_by)
+
+    active_records = None
+    active_filters = {}
+    selected_image_info = None
+    selected_image_container_style = {}
+    image_grid_style = {}
+
+    return (bundle.project_folder, bundle.dataset_id, active_records,
+            active_filters, bundle.frame.columns, bundle.labels, img_column,
+            bundle.parameters, bundle.figure, sort_by_children,
+            color_by_children, bundle.columns, selected_image_info,
+            selected_image_container_style, image_grid_style, {})
@@ -2,16 +2,19 @@
 import dash
 from dash import Patch
 from dash.dependencies import Input, Output, State
-import pandas as pd
+
+from encoding import encode_rows
+from filters import filter_indices
+from registry import get_dataset, get_indexes
 
 
 @dash.callback(
     Output('active-records', 'data', allow_duplicate=True),
     [Input('active-filters', 'data'),
-     State('df', 'data')],
+     State('dataset-id', 'data')],
     prevent_initial_call=True,
 )
-def update_active_records(data, df_records):
+def update_active_records(data, dataset_id):
     """If the data in active-filters is changed, the data will be updated in
     active-records.
     
@@ -33,24 +36,17 @@ def update_active_records(data, df_records):
     i.e., [min, max], and one column can have multiple selections. The value can
     also be None if a selection has previously been made for this column but
     since removed.
+
+    The data in active-records is the row positions in the dataset that pass
+    the filters, encoded with encoding.encode_rows, or None if there are no
+    filters.
     """
     if data:
-        dff = pd.DataFrame.from_records(df_records)
-        for col in data:
-            if data[col]:
-                # there is a selection, i.e., the value is not None
-                rng = data[col][0]
-                if isinstance(rng[0], list):
-                    # if multiple choices combine df
-                    dff3 = pd.DataFrame(columns=dff.columns)
-                    for i in rng:
-                        dff2 = dff[dff[col].between(i[0], i[1])]
-                        dff3 = pd.concat([dff3, dff2])
-                    dff = dff3
-                else:
-                    # there is one selection
-                    dff = dff[dff[col].between(rng[0], rng[1])]
-        return dff.to_dict('records')
+        dff = get_dataset(dataset_id)
+        indices = filter_indices(dff, data, get_indexes(dataset_id))
+        if indices is None:
+            return None
+        return encode_rows(indices, len(dff))
     return dash.no_update
 
 
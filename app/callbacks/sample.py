@@ -2,18 +2,17 @@
 import dash
 from dash import ALL, ctx
 from dash.dependencies import Input, Output
-import pandas as pd
-import plotly.express as px
 
 from containers import create_color_by_children, create_sort_by_children
-from helper import process_dataframe
+from registry import load_project
+from thumbnails import get_thumbnails
 from samples import sample_alias
 from config import assets_path
 
 
 @dash.callback(
     [Output('project-folder', 'data', allow_duplicate=True),
-     Output('df', 'data', allow_duplicate=True),
+     Output('dataset-id', 'data', allow_duplicate=True),
      Output('active-records', 'data', allow_duplicate=True),
      Output('active-filters', 'data', allow_duplicate=True),
      Output('df-columns', 'data', allow_duplicate=True),
@@ -37,45 +36,17 @@ def update_sample_project(n_clicks):
     """If a click is registered in the sort by dropdown, the data is updated in
     sort-by-column, and the label is updated in sort-by-dropdown."""
     sample_project = ctx.triggered_id.select_sample_project
-    project_folder = f'assets/samples/{sample_project}'
     select_sample_dropdown_label = sample_alias[sample_project]['display_name']
     csv = assets_path.joinpath('samples', sample_project, 'data.csv')
-    dff = pd.read_csv(csv)
-    df_records = dff.to_dict('records')
+    bundle = load_project(csv)
+    img_column = bundle.img_column
+    if img_column:
+        get_thumbnails(
+            bundle.dataset_id, bundle.project_folder, bundle.frame[img_column])
 
-    labels, parameters, input_columns, output_columns, image_columns = \
-        process_dataframe(dff)
-
-    # color by first output column, or first input column
-    if output_columns:
-        color_by = output_columns[0]
-        sort_by = output_columns[0]
-    else:
-        color_by = input_columns[0]
-        sort_by = output_columns[0]
-
-    fig = px.parallel_coordinates(dff, color=color_by, labels=labels)
-
-    img_columns = dff.filter(regex=f'^img:').columns
-    if img_columns.empty:
-        img_column = None
-    else:
-        img_column = img_columns[0]
-
-    columns = []
-    for value in parameters.values():
-        if value['type'] != 'img':
-            columns.append(
-                {'id': value['label'],
-                 'name': value['display_name']})
-        else:
-            columns.append(
-                {'id': value['label'],
-                 'name': value['display_name'],
-                 'hidden': True})
-
-    sort_by_children = create_sort_by_children(parameters, sort_by)
-    color_by_children = create_color_by_children(parameters, color_by)
+    sort_by_children = create_sort_by_children(bundle.parameters, bundle.sort_by)
+    color_by_children = create_color_by_children(
+        bundle.parameters, bundle.color_by)
 
     active_filters = {}
     selected_image_info = None
@@ -86,8 +57,11 @@ def update_sample_project(n_clicks):
     if not img_column:
         main_images_container_style = {'display': 'none'}
 
-    return (project_folder, df_records, df_records, active_filters, dff.columns,
-            labels, img_column, parameters, fig, select_sample_dropdown_label,
-            sort_by_children, color_by_children, columns, selected_image_info,
-            selected_image_container_style, main_images_container_style,
-            images_grid_style, selected_image_container_style)
+    active_records = None
+    return (bundle.project_folder, bundle.dataset_id, active_records,
+            active_filters, bundle.frame.columns, bundle.labels, img_column,
+            bundle.parameters, bundle.figure, select_sample_dropdown_label,
+            sort_by_children, color_by_children, bundle.columns,
+            selected_image_info, selected_image_container_style,
+            main_images_container_style, images_grid_style,
+            selected_image_container_style)
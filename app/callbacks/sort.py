@@ -1,39 +1,49 @@
-"""Module for sort callbacks."""
+"""Module for sort callbacks.
+
+The sort callbacks only change the state of the sort controls, so they run in
+the browser as clientside callbacks.
+"""
 import dash
-from dash import ALL, ctx
+from dash import ALL
 from dash.dependencies import Input, Output, State
 
 
-@dash.callback(
+# If a click is registered in the button-ascending, the data is updated in
+# sort-ascending, and the className is updated in button-ascending-icon.
+dash.clientside_callback(
+    """
+    function update_sort_ascending(n_clicks, sort_ascending) {
+        if (sort_ascending) {
+            return [false, 'bi bi-sort-down'];
+        }
+        return [true, 'bi bi-sort-up'];
+    }
+    """,
     [Output(component_id='sort-ascending', component_property='data'),
      Output(component_id='button-ascending-icon', component_property='className')],
     [Input(component_id='button-ascending', component_property='n_clicks'),
      State(component_id='sort-ascending', component_property='data')],
     prevent_initial_call=True
 )
-def update_sort_ascending(n_clicks, sort_ascending):
-    """If a click is registered in the button-ascending, the data is updated in
-    sort-ascending, the className is updated in button-ascending-icon, and the
-    children is updated in button-ascending-text."""
-    if sort_ascending:
-        return False, 'bi bi-sort-down'
-    else:
-        return True, 'bi bi-sort-up'
 
 
-@dash.callback(
+# If a click is registered in the sort by dropdown, the data is updated in
+# sort-by-column, and the label is updated in sort-by-dropdown.
+dash.clientside_callback(
+    """
+    function update_sort_by(n_clicks, labels) {
+        const no_update = window.dash_clientside.no_update;
+        const triggered_id = window.dash_clientside.callback_context.triggered_id;
+        if (n_clicks.every(v => v === null || v === undefined) || !triggered_id) {
+            return [no_update, no_update];
+        }
+        const sort_by = triggered_id.sort_by_dropdown;
+        return [sort_by, labels[sort_by]];
+    }
+    """,
     [Output('sort-by-column', 'data'),
      Output('sort-by-dropdown', 'label')],
     [Input({'sort_by_dropdown': ALL}, 'n_clicks'),
      State('labels', 'data')],
     prevent_initial_call=True
 )
-def update_sort_by(n_clicks, labels):
-    """If a click is registered in the sort by dropdown, the data is updated in
-    sort-by-column, and the label is updated in sort-by-dropdown."""
-    if all(v is None for v in n_clicks):
-        return (dash.no_update,) * 2
-
-    sort_by = ctx.triggered_id.sort_by_dropdown
-
-    return sort_by, labels[sort_by]
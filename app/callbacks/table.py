@@ -1,13 +1,54 @@
 """Module for table callbacks."""
+import math
 import dash
-from dash.dependencies import Input, Output
+from dash import ctx
+from dash.dependencies import Input, Output, State
+
+from config import table_page_size
+from encoding import decode_rows
+from indexes import order_rows
+from registry import get_dataset, get_indexes
+
+
+def table_page_count(total: int) -> int:
+    """Get the number of pages of the table for total rows."""
+    return max(1, math.ceil(total / table_page_size))
 
 
 @dash.callback(
-    Output('table', 'data', allow_duplicate=True),
-    Input('active-records', 'data'),
+    [Output('table', 'data', allow_duplicate=True),
+     Output('table', 'page_current'),
+     Output('table', 'page_count'),
+     Output('table', 'sort_by')],
+    [Input('active-records', 'data'),
+     State('dataset-id', 'data'),
+     Input('table', 'page_current'),
+     Input('table', 'sort_by')],
     prevent_initial_call=True,
 )
-def update_table_data(active_records):
-    """If the active-records is changed, the data will be updated in table."""
-    return active_records
+def update_table_data(active_records, dataset_id, page_current, sort_by):
+    """If the active-records, the page or the sort of the table is changed, the
+    data will be updated in table.
+
+    Only the rows of the current page are sent. The active rows are sorted on
+    the server with the sorted indexes of the dataset. The page is reset to the
+    first page unless the page itself was changed.
+    """
+    dff = get_dataset(dataset_id)
+    # the sort of a previous project is dropped
+    sort_by = [s for s in sort_by or [] if s['column_id'] in dff.columns]
+    column, ascending = None, True
+    if sort_by:
+        column = sort_by[0]['column_id']
+        ascending = sort_by[0]['direction'] == 'asc'
+    rows = order_rows(dff, get_indexes(dataset_id), column,
+                      decode_rows(active_records), ascending=ascending)
+
+    page_count = table_page_count(len(rows))
+    if ctx.triggered_id != 'table' or not page_current:
+        page_current = 0
+    page_current = min(page_current, page_count - 1)
+    start = page_current * table_page_size
+    page_rows = rows[start:start + table_page_size]
+    return (dff.iloc[page_rows].to_dict('records'), page_current, page_count,
+            sort_by)
@@ -0,0 +1,69 @@
+"""Module for mapping the values of a column to colors.
+
+A colorscale is sampled once into a lookup table of 256 colors. A whole column
+is then mapped to colors with a single NumPy operation and the result is cached
+per dataset and column.
+"""
+from functools import lru_cache
+import numpy as np
+from plotly import colors as plotly_colors
+
+from metrics import count_cache
+from registry import get_dataset, get_memo
+
+colorscale = 'plasma'
+default_color = '#636EFA'
+lut_size = 256
+
+
+@lru_cache(maxsize=None)
+def colorscale_lut(name: str = colorscale, size: int = lut_size) -> np.ndarray:
+    """Get an array of hex colors sampled evenly from a colorscale."""
+    rgb_colors = plotly_colors.sample_colorscale(name, np.linspace(0, 1, size))
+    hex_colors = []
+    for rgb in rgb_colors:
+        red, green, blue = plotly_colors.unlabel_rgb(rgb)
+        hex_colors.append(f'#{round(red):02x}{round(green):02x}{round(blue):02x}')
+    return np.array(hex_colors)
+
+
+def map_colors(
+        values: np.ndarray, minimum: float, maximum: float,
+        name: str = colorscale) -> np.ndarray:
+    """Map values to hex colors.
+
+    The values are scaled between minimum and maximum and the color is taken
+    from the lookup table of the colorscale. NaN values get the default color.
+    """
+    values = np.asarray(values, dtype=float)
+    lut = colorscale_lut(name)
+    if maximum > minimum:
+        samplepoints = (values - minimum) / (maximum - minimum)
+    else:
+        samplepoints = np.zeros_like(values)
+    nan_values = np.isnan(samplepoints)
+    samplepoints = np.clip(np.nan_to_num(samplepoints), 0, 1)
+    colors = lut[np.rint(samplepoints * (len(lut) - 1)).astype(int)]
+    colors[nan_values] = default_color
+    return colors
+
+
+def column_range(dataset_id: str, color_by: str):
+    """Get the minimum and maximum of a column in a dataset."""
+    values = get_dataset(dataset_id)[color_by]
+    return values.min(), values.max()
+
+
+def column_colors(dataset_id: str, color_by: str) -> np.ndarray:
+    """Get the hex colors of all rows of a dataset colored by a column.
+
+    The colors are cached for each dataset and column.
+    """
+    memo = get_memo(dataset_id)
+    key = ('colors', color_by)
+    count_cache('colors', key in memo)
+    if key not in memo:
+        minimum, maximum = column_range(dataset_id, color_by)
+        memo[key] = map_colors(
+            get_dataset(dataset_id)[color_by].to_numpy(), minimum, maximum)
+    return memo[key]
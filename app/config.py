@@ -2,6 +2,58 @@
 import os
 from pathlib import Path
 
-assets_path = Path(__file__).parent.joinpath('assets')
-pollination_path = Path(__file__).parent.joinpath('pollination')
+app_path = Path(__file__).parent
+assets_path = app_path.joinpath('assets')
+pollination_path = app_path.joinpath('pollination')
 base_path = os.getenv('POLLINATION_API_URL', 'https://api.staging.pollination.solutions')
+
+# maximum number of datasets kept in memory by the server-side registry
+dataset_cache_size = int(os.getenv('DATASET_CACHE_SIZE', '8'))
+
+# number of images rendered per page of the images grid
+images_page_size = int(os.getenv('IMAGES_PAGE_SIZE', '100'))
+
+# number of rows sent per page of the table
+table_page_size = int(os.getenv('TABLE_PAGE_SIZE', '25'))
+
+# folder, size in pixels and number of worker processes for the thumbnails of
+# the images grid
+thumbnail_path = Path(os.getenv('THUMBNAIL_PATH', app_path.joinpath('thumbnails')))
+thumbnail_size = int(os.getenv('THUMBNAIL_SIZE', '256'))
+thumbnail_workers = int(os.getenv('THUMBNAIL_WORKERS', str(os.cpu_count() or 1)))
+# thumbnails created at once, up to this number they are created in the request
+# instead of by the worker processes, e.g., the thumbnails of a page of the grid
+thumbnail_inline = int(os.getenv('THUMBNAIL_INLINE', str(images_page_size)))
+
+# number of concurrent downloads and retries for the artifacts of a project
+download_workers = int(os.getenv('DOWNLOAD_WORKERS', '8'))
+download_retries = int(os.getenv('DOWNLOAD_RETRIES', '3'))
+
+# download all images when a project is loaded from Pollination instead of
+# downloading each image the first time it is requested
+prefetch_images = os.getenv('PREFETCH_IMAGES', 'false').lower() == 'true'
+# seconds the remote folder of a project, which has the API key of the user who
+# imported it, is kept after a file was last downloaded from it on demand
+remote_folder_ttl = int(os.getenv('REMOTE_FOLDER_TTL', '3600'))
+# seconds a file that could not be downloaded on demand is not requested again
+download_miss_ttl = int(os.getenv('DOWNLOAD_MISS_TTL', '60'))
+
+# maximum number of rows drawn in the parallel coordinates, larger studies are
+# drawn from a stratified sample
+parcoords_max_rows = int(os.getenv('PARCOORDS_MAX_ROWS', '20000'))
+
+# file the callback requests are logged to as JSON lines, - for stderr, the
+# requests are not logged if it is not set
+metrics_log = os.getenv('METRICS_LOG')
+
+# folder of the cache and the locks that are shared by the worker processes
+cache_path = Path(os.getenv('CACHE_PATH', app_path.joinpath('cache')))
+
+# JSON engine of the responses, orjson or json for the serializer of plotly
+json_engine = os.getenv('JSON_ENGINE', 'orjson')
+
+# responses smaller than this are not compressed, in bytes, and the levels of
+# brotli (0-11) and gzip (1-9)
+compress_min_size = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+compress_br_level = int(os.getenv('COMPRESS_BR_LEVEL', '4'))
+compress_gzip_level = int(os.getenv('COMPRESS_GZIP_LEVEL', '6'))
@@ -1,12 +1,13 @@
 """Module with function to create containers for the app layout."""
+import math
 from typing import List
-from pathlib import Path
-import numpy as np
-import plotly.express as px
 from dash import html, dcc
 import dash_bootstrap_components as dbc
 import pollination_dash_io
 
+from config import images_page_size
+from serving import versioned_src
+
 
 def logo_title(app) -> html.Div:
     """Function to create the Div that containers the Pollination logo and app
@@ -76,6 +77,26 @@ def create_radio_container() -> html.Div:
     return container
 
 
+def create_import_progress() -> html.Div:
+    """Function to create the Div with the progress of the import of a project
+    from Pollination. It is only shown while the import runs."""
+    progress = dbc.Progress(
+        id='import-progress', value=0, striped=True, animated=True,
+        className='import-progress-bar')
+    status = html.Span(id='import-status', className='import-status')
+    cancel = dbc.Button(
+        'Cancel', id='import-cancel', size='sm', color='secondary',
+        disabled=True)
+    store = dcc.Store(id='pollination-import')
+
+    return html.Div(
+        children=[progress, status, cancel, store],
+        id='import-progress-container',
+        className='import-progress',
+        style={'display': 'none'}
+    )
+
+
 def select_pollination_project():
     """Function to create a Div for selecting a project on Pollination."""
     select_project_container = html.Div(
@@ -234,49 +255,112 @@ def create_sort_by_children(parameters, sort_by) -> html.Div:
     return children
 
 
+def image_src(image_name, project_folder, thumbnails) -> str:
+    """Function to get the src of an image in the images grid. The thumbnail
+    is used if the image has one in thumbnails."""
+    if image_name in thumbnails:
+        return f'thumbnails/{thumbnails[image_name]}'
+    return versioned_src(project_folder, image_name)
+
+
 def create_images_grid_children(
-        sorted_df_records, color_by, minimum, maximum, img_column,
-        project_folder) -> List[html.Div]:
+        images, border_colors, project_folder, thumbnails=None) -> List[html.Div]:
+    """Function to create the children of the images grid.
+
+    Only the images of the current page should be passed in, together with the
+    border color of each image. If an image has a thumbnail in thumbnails, the
+    thumbnail is used instead of the full image."""
     children = []
-    project_folder = Path(project_folder)
-    for record in sorted_df_records:
-        samplepoints = np.interp(record[color_by], [minimum, maximum], [0, 1])
-        border_color = px.colors.sample_colorscale(
-            'plasma', samplepoints=samplepoints
-        )[0]
-        src = project_folder.joinpath(record[img_column])
+    thumbnails = thumbnails or {}
+    for image_name, border_color in zip(images, border_colors):
         image = html.Div(
-            html.Img(src=src.as_posix(),
-                     id={'image': f'{record[img_column]}'},
+            html.Img(src=image_src(image_name, project_folder, thumbnails),
+                     id={'image': f'{image_name}'},
                      className='image-grid',
                      style={'border-color': border_color}
                      ),
-            style={
-                'aspect-ratio': '1',
-                'width': '100%',
-                'height': '100%',
-                'position': 'relative',
-                'display': 'flex',
-                'align-items': 'center',
-                'justify-content': 'center',
-            }
+            className='image-grid-item'
         )
         children.append(image)
 
     return children
 
 
-def create_images_container(images_div, parameters, sort_by) -> html.Div:
-    """Function to create a Div for images."""
+def create_images_grid_page(
+        images, border_colors, project_folder, thumbnails=None) -> dict:
+    """Function to create the data of images-grid-page, i.e., the images, the
+    srcs and the border colors of a page of the images grid. The children of
+    the grid are created from it in the browser."""
+    thumbnails = thumbnails or {}
+    return {
+        'images': list(images),
+        'srcs': [image_src(image_name, project_folder, thumbnails)
+                 for image_name in images],
+        'colors': list(border_colors)
+    }
+
+
+def create_images_pagination(total: int) -> html.Div:
+    """Function to create the Div with the number of images and the pagination
+    of the images grid."""
+    max_value, style = images_pagination_state(total)
+    pagination = dbc.Pagination(
+        id='images-pagination',
+        active_page=1,
+        max_value=max_value,
+        fully_expanded=False,
+        size='sm',
+        style=style
+    )
+    images_count = html.Span(
+        id='images-count', children=images_count_text(total),
+        className='images-count')
+
+    container = html.Div(
+        children=[images_count, pagination],
+        id='images-pagination-container',
+        className='images-pagination'
+    )
+
+    return container
+
+
+def images_pagination_state(total: int):
+    """Function to get the number of pages and the style of the pagination. The
+    pagination is hidden if there is only one page."""
+    max_value = max(1, math.ceil(total / images_page_size))
+    style = {} if max_value > 1 else {'display': 'none'}
+    return max_value, style
+
+
+def images_count_text(total: int) -> str:
+    """Function to get the text with the number of images."""
+    return f'{total} design{"" if total == 1 else "s"}'
+
+
+def create_images_container(
+        images_grid_page, parameters, sort_by, total,
+        images_grid_rows=None) -> html.Div:
+    """Function to create a Div for images.
+
+    The images grid is created empty. Its children are created in the browser
+    from images_grid_page, see create_images_grid_page. images_grid_rows has
+    the dataset id and the row positions of the images in images_grid_page."""
     children = create_sort_by_children(parameters, sort_by)
     sort_container = html.Div(
         children=children,
         className='sort-by',
         id='sort-by'
     )
+    pagination_container = create_images_pagination(total)
 
     images_container = html.Div(
         [dcc.Store(id='selected-image-data'),
+         dcc.Store(id='clicked-image'),
+         dcc.Store(id='images-grid-values'),
+         dcc.Store(id='images-sort'),
+         dcc.Store(id='images-grid-rows', data=images_grid_rows),
+         dcc.Store(id='images-grid-page', data=images_grid_page),
          html.Div(
              [html.Div(
                  id='selected-image-info', className='selected-image-info'),
@@ -289,11 +373,11 @@ def create_images_container(images_div, parameters, sort_by) -> html.Div:
              id='selected-image-container',
              className='selected-image-container'),
          html.Div(
-             children=images_div, id='images-grid', className='images-grid')],
+             children=[], id='images-grid', className='images-grid')],
         id='images-container', className='images-container')
 
     main_images_container = html.Div([
-        sort_container, images_container
+        sort_container, pagination_container, images_container
     ],
         id='main-images-container', className='main-images-container'
     )
@@ -0,0 +1,92 @@
+"""Module for reading the data.csv file of a project.
+
+The first time a CSV file is read an Arrow sidecar file is written next to it.
+Later reads use the sidecar, which is memory-mapped, and the CSV file is only
+parsed again if it has changed since the sidecar was written.
+"""
+import os
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+
+from helper import temp_path
+from metrics import count_cache
+
+sidecar_suffix = '.arrow'
+_stamp_key = b'design-explorer-csv-stamp'
+
+
+def sidecar_path(csv_path: Path) -> Path:
+    """Get the path of the Arrow sidecar file of a CSV file."""
+    return csv_path.with_name(f'.{csv_path.name}{sidecar_suffix}')
+
+
+def _csv_stamp(csv_path: Path) -> bytes:
+    stat = csv_path.stat()
+    return f'{stat.st_mtime_ns}:{stat.st_size}'.encode()
+
+
+def parse_csv(csv_path: Path) -> pd.DataFrame:
+    """Parse a CSV file with the dtypes of its in:, out: and img: columns.
+
+    The image columns are read as strings. The input and output columns are
+    read as numbers.
+    """
+    header = pd.read_csv(csv_path, nrows=0).columns
+    dtype = {col: str for col in header if col.startswith('img:')}
+    df = pd.read_csv(csv_path, dtype=dtype, engine='pyarrow')
+    for col in header:
+        if col.startswith(('in:', 'out:')) and \
+                not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def _read_sidecar(csv_path: Path, stamp: bytes):
+    """Read the sidecar of a CSV file. None is returned if there is no sidecar
+    or if the CSV file has changed since it was written."""
+    path = sidecar_path(csv_path)
+    if not path.exists():
+        return None
+    try:
+        with pa.memory_map(path.as_posix(), 'r') as source:
+            table = pa.ipc.open_file(source).read_all()
+    except (OSError, pa.ArrowInvalid):
+        return None
+    metadata = table.schema.metadata or {}
+    if metadata.get(_stamp_key) != stamp:
+        return None
+    return table.to_pandas(split_blocks=True)
+
+
+def _write_sidecar(csv_path: Path, stamp: bytes, df: pd.DataFrame):
+    """Write the sidecar of a CSV file.
+
+    The sidecar is written to a temporary file that is renamed when it is done.
+    A folder that is not writable is ignored.
+    """
+    path = sidecar_path(csv_path)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata(
+        {**(table.schema.metadata or {}), _stamp_key: stamp})
+    temp_file = temp_path(path)
+    try:
+        with pa.OSFile(temp_file.as_posix(), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(temp_file, path)
+    except OSError:
+        temp_file.unlink(missing_ok=True)
+
+
+def read_data_csv(csv_path: Path) -> pd.DataFrame:
+    """Read the data.csv file of a project, using the Arrow sidecar if it is up
+    to date."""
+    csv_path = Path(csv_path)
+    stamp = _csv_stamp(csv_path)
+    df = _read_sidecar(csv_path, stamp)
+    count_cache('sidecar', df is not None)
+    if df is None:
+        df = parse_csv(csv_path)
+        _write_sidecar(csv_path, stamp, df)
+    return df
@@ -0,0 +1,287 @@
+"""Module for downloading the artifacts of a Pollination project.
+
+The artifacts are downloaded concurrently by a bounded pool of threads that
+share one HTTP session, i.e., the connections are reused. Failed requests are
+retried with backoff and the files are streamed to disk.
+
+The artifacts can also be downloaded on demand, i.e., the first time a file is
+requested from the image route. The remote folders are kept in the shared cache
+until they have not been used for REMOTE_FOLDER_TTL seconds, so the API key of
+the user is not kept on disk after the project is no longer browsed. A download
+holds a file lock, so any worker can serve the images of a
+project that another worker imported and a file is downloaded only once. Only
+the images of the project can be downloaded on demand, and a file that could
+not be downloaded is not requested again for DOWNLOAD_MISS_TTL seconds.
+"""
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, \
+    Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from werkzeug.security import safe_join
+
+from cache import cache_get, cache_get_expiring, cache_set, cache_touch
+from config import base_path, pollination_path, download_workers, \
+    download_retries, download_miss_ttl, remote_folder_ttl
+from helper import temp_path
+from locks import file_lock
+
+chunk_size = 1024 * 1024
+timeout = 60
+
+
+def create_session(pool_size: int = download_workers) -> requests.Session:
+    """Create an HTTP session with a connection pool of pool_size and retries
+    with backoff."""
+    retry = Retry(
+        total=download_retries,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=('GET',),
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def api_headers(api_key: str) -> Dict[str, str]:
+    """Get the headers to authenticate with the Pollination API."""
+    # pollination_io is slow to import and only needed for Pollination projects
+    from pollination_io.api.client import ApiClient
+    return ApiClient(api_token=api_key).headers
+
+
+def download_url(owner: str, project_name: str, host: str = base_path) -> str:
+    """Get the URL of the endpoint that returns the signed URL of an artifact."""
+    return f'{host.rstrip("/")}/projects/{owner}/{project_name}/artifacts/download'
+
+
+def download_artifact(
+        session: requests.Session, url: str, headers: Dict[str, str],
+        artifact_path: str, output_path: Path):
+    """Download one artifact to output_path.
+
+    The signed URL is requested from url and the artifact is streamed to a
+    temporary file that is renamed to output_path when the download is done.
+    """
+    res = session.get(
+        url, params={'path': artifact_path}, headers=headers, timeout=timeout)
+    res.raise_for_status()
+    try:
+        signed_url = res.json()
+    except ValueError:
+        signed_url = res.text
+
+    # the signed URL must not get the headers of the Pollination API
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = temp_path(output_path, '.part')
+    try:
+        with session.get(signed_url, stream=True, timeout=timeout) as res:
+            res.raise_for_status()
+            with temp_file.open('wb') as f:
+                for chunk in res.iter_content(chunk_size=chunk_size):
+                    f.write(chunk)
+        os.replace(temp_file, output_path)
+    finally:
+        temp_file.unlink(missing_ok=True)
+
+
+def download_artifacts(
+        api_key: str, owner: str, project_name: str, artifact_folder: Path,
+        files: Iterable[str], output_folder: Path,
+        max_workers: int = download_workers, host: str = base_path,
+        on_progress: Callable[[int, int], None] = None) -> List[str]:
+    """Download files from an artifact folder of a project to output_folder.
+
+    Args:
+        api_key: The API key of the user.
+        owner: The name of the owner of the project.
+        project_name: The name of the project.
+        artifact_folder: The folder of the files in the artifacts of the project.
+        files: The names of the files relative to artifact_folder.
+        output_folder: The folder to download the files to.
+        max_workers: The maximum number of concurrent downloads.
+        host: The URL of the Pollination API.
+        on_progress: A function that is called with the number of finished
+            downloads and the total number of downloads.
+
+    Returns:
+        The names of the files that could not be downloaded.
+    """
+    files = list(dict.fromkeys(files))
+    url = download_url(owner, project_name, host)
+    headers = api_headers(api_key)
+    failed = []
+    with create_session(max_workers) as session, \
+            ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            file: executor.submit(
+                download_artifact, session, url, headers,
+                Path(artifact_folder).joinpath(file).as_posix(),
+                Path(output_folder).joinpath(file))
+            for file in files
+        }
+        try:
+            for count, (file, future) in enumerate(futures.items(), start=1):
+                if future.exception() is not None:
+                    failed.append(file)
+                if on_progress is not None:
+                    on_progress(count, len(files))
+        except BaseException:
+            # the downloads that did not start are dropped, the others remove
+            # their .part files when they stop
+            executor.shutdown(cancel_futures=True)
+            raise
+
+    return failed
+
+
+class RemoteFolder(NamedTuple):
+    """A folder in the artifacts of a Pollination project whose files are
+    downloaded on demand.
+
+    images are the paths of the files relative to the folder that can be
+    downloaded, i.e., the images in the data.csv file of the project.
+    """
+    api_key: str
+    owner: str
+    project_name: str
+    artifact_folder: str
+    host: str = base_path
+    images: FrozenSet[str] = frozenset()
+
+
+# remote folders and the time they expire keyed by the local folder relative to
+# the pollination folder
+_remote_folders: Dict[str, Tuple[RemoteFolder, float]] = {}
+# downloads in progress keyed by the path of the file relative to the
+# pollination folder
+_in_progress: Dict[str, Future] = {}
+_lock = threading.Lock()
+_session = None
+
+
+def register_remote_folder(local_folder: str, remote_folder: RemoteFolder):
+    """Register a remote folder for a local folder in the pollination folder.
+
+    Files that are requested from the local folder and that do not exist are
+    downloaded from the remote folder. The remote folder expires when no file
+    has been downloaded from it for remote_folder_ttl seconds.
+    """
+    local_folder = Path(local_folder).as_posix()
+    remote_folder = remote_folder._replace(images=frozenset(
+        PurePosixPath(image).as_posix() for image in remote_folder.images))
+    with _lock:
+        _remote_folders[local_folder] = (
+            remote_folder, time.time() + remote_folder_ttl)
+    # the other workers find the remote folder in the shared cache
+    cache_set(('remote_folder', local_folder), tuple(remote_folder),
+              expire=remote_folder_ttl)
+
+
+def _touch_remote_folder(local_folder: str, remote_folder: RemoteFolder):
+    """Keep a remote folder for remote_folder_ttl seconds from now."""
+    with _lock:
+        _remote_folders[local_folder] = (
+            remote_folder, time.time() + remote_folder_ttl)
+    cache_touch(('remote_folder', local_folder), expire=remote_folder_ttl)
+
+
+def _find_remote_folder(path: str):
+    """Get the local folder and the remote folder of a file path."""
+    for parent in PurePosixPath(path).parents:
+        local_folder = parent.as_posix()
+        with _lock:
+            remote_folder, expire_time = _remote_folders.get(
+                local_folder, (None, None))
+        if remote_folder is None or expire_time < time.time():
+            # the remote folder may have been used by another worker since
+            value, expire_time = cache_get_expiring(
+                ('remote_folder', local_folder))
+            with _lock:
+                if value is None:
+                    _remote_folders.pop(local_folder, None)
+                    continue
+                remote_folder = RemoteFolder(*value)
+                _remote_folders[local_folder] = (remote_folder, expire_time)
+        return local_folder, remote_folder
+    return None, None
+
+
+def _get_session() -> requests.Session:
+    global _session
+    with _lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def fetch_on_demand(path: str) -> bool:
+    """Download a file in the pollination folder if it does not exist.
+
+    Concurrent requests for the same file are coalesced into one download, in
+    one worker by a future and across workers by a file lock. Files that are
+    not images of the remote folder are not downloaded, and a file that could
+    not be downloaded is not requested again for download_miss_ttl seconds.
+
+    Args:
+        path: The path of the file relative to the pollination folder.
+
+    Returns:
+        True if the file exists after the call.
+    """
+    file_path = safe_join(pollination_path.as_posix(), path)
+    if file_path is None:
+        return False
+    output_path = Path(file_path)
+    if output_path.is_file():
+        return True
+    local_folder, remote_folder = _find_remote_folder(path)
+    if remote_folder is None:
+        return False
+    image = PurePosixPath(path).relative_to(local_folder).as_posix()
+    if image not in remote_folder.images:
+        return False
+    miss_key = ('download_miss', path)
+    if cache_get(miss_key):
+        return False
+
+    with _lock:
+        future = _in_progress.get(path)
+        owner = future is None
+        if owner:
+            future = Future()
+            _in_progress[path] = future
+
+    if owner:
+        artifact_path = PurePosixPath(remote_folder.artifact_folder).joinpath(
+            image).as_posix()
+        try:
+            # another worker may have downloaded the file while this one waited
+            with file_lock(f'download:{path}', striped=True):
+                if not output_path.is_file():
+                    download_artifact(
+                        _get_session(),
+                        download_url(remote_folder.owner,
+                                     remote_folder.project_name,
+                                     remote_folder.host),
+                        api_headers(remote_folder.api_key), artifact_path,
+                        output_path)
+            _touch_remote_folder(local_folder, remote_folder)
+            future.set_result(True)
+        except Exception:
+            cache_set(miss_key, True, expire=download_miss_ttl)
+            future.set_result(False)
+        finally:
+            with _lock:
+                _in_progress.pop(path, None)
+
+    return future.result()
@@ -0,0 +1,89 @@
+"""Module for the compact encoding of the data that is sent to the browser.
+
+The row positions in active-records are sent as a base64 typed array, either a
+bitmap with one bit per row of the dataset or an array of uint32 positions,
+whichever is smaller. The numeric arrays of the parallel coordinates are
+downcast to the smallest type that keeps their values and sent as plotly typed
+array specs, i.e., {'dtype': 'f4', 'bdata': base64}, since plotly sends integer
+arrays as lists of numbers.
+"""
+import base64
+from typing import Dict, Optional
+import numpy as np
+
+# relative error of the values that is accepted when floats are downcast
+float32_tolerance = 1e-6
+
+
+def encode_rows(rows: Optional[np.ndarray], row_count: int) -> Optional[Dict]:
+    """Encode the positions of rows in a dataset with row_count rows.
+
+    None is returned if rows is None, i.e., if all rows are active.
+    """
+    if rows is None:
+        return None
+    rows = np.asarray(rows, dtype=np.uint32)
+    if row_count <= len(rows) * 32:
+        mask = np.zeros(row_count, dtype=bool)
+        mask[rows] = True
+        return {'dtype': 'bitmap', 'shape': row_count,
+                'bdata': base64.b64encode(np.packbits(mask)).decode()}
+    return {'dtype': 'u4',
+            'bdata': base64.b64encode(rows.astype('<u4').tobytes()).decode()}
+
+
+def decode_rows(data) -> Optional[np.ndarray]:
+    """Decode the positions of rows that were encoded with encode_rows.
+
+    A list of positions is returned as an array and None is returned as None.
+    """
+    if data is None:
+        return None
+    if isinstance(data, list):
+        return np.asarray(data, dtype=np.int64)
+    buffer = base64.b64decode(data['bdata'])
+    if data['dtype'] == 'bitmap':
+        mask = np.unpackbits(
+            np.frombuffer(buffer, dtype=np.uint8), count=data['shape'])
+        return np.flatnonzero(mask)
+    return np.frombuffer(buffer, dtype='<u4').astype(np.int64)
+
+
+def compact_array(values: np.ndarray) -> np.ndarray:
+    """Downcast a numeric array to the smallest type that keeps its values.
+
+    Integers are downcast to the smallest integer type that holds their range
+    and floats are downcast to float32 if the relative error is below
+    float32_tolerance. Other arrays are returned as they are.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in 'iu' and values.size:
+        for dtype in (np.int8, np.uint8, np.int16, np.uint16, np.int32):
+            info = np.iinfo(dtype)
+            if info.min <= values.min() and values.max() <= info.max:
+                return values.astype(dtype)
+        return values
+    if values.dtype == np.float64:
+        with np.errstate(over='ignore', invalid='ignore'):
+            downcast = values.astype(np.float32)
+        if np.allclose(downcast, values, rtol=float32_tolerance, atol=0,
+                       equal_nan=True):
+            return downcast
+    return values
+
+
+def typed_array(values: np.ndarray):
+    """Get the plotly typed array spec of a numeric array after it is downcast
+    with compact_array.
+
+    Arrays that are not numeric are returned as they are.
+    """
+    values = compact_array(values)
+    if values.dtype.kind not in 'iuf':
+        return values
+    if values.dtype.itemsize == 8 and values.dtype.kind in 'iu':
+        # plotly.js has no 64-bit integer arrays
+        values = values.astype(np.float64)
+    values = values.astype(values.dtype.newbyteorder('<'))
+    return {'dtype': values.dtype.str[1:],
+            'bdata': base64.b64encode(values.tobytes()).decode()}
@@ -0,0 +1,109 @@
+"""Module for the parallel coordinates figure.
+
+Studies with more rows than parcoords_max_rows are drawn from a stratified
+subsample of the rows. The filters of the parallel coordinates are still applied
+to all rows on the server, so the number of active designs stays exact.
+"""
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from config import parcoords_max_rows
+from encoding import typed_array
+
+strata_count = 20
+
+
+def sample_rows(
+        df: pd.DataFrame, color_by: str,
+        max_rows: int = parcoords_max_rows) -> Optional[np.ndarray]:
+    """Get the positions of a stratified subsample of the rows of df.
+
+    The rows are split into strata by the quantiles of the color_by column and
+    every stratum is sampled in proportion to its size, so the distribution of
+    the colors is preserved. The rows with the minimum and maximum value of each
+    numeric column are always included. None is returned if df has no more than
+    max_rows rows.
+    """
+    row_count = len(df)
+    if row_count <= max_rows:
+        return None
+    rng = np.random.default_rng(0)
+
+    extremes = set()
+    for col_name, col_series in df.items():
+        if pd.api.types.is_numeric_dtype(col_series) and col_series.notna().any():
+            extremes.update((col_series.argmin(), col_series.argmax()))
+    extremes = np.array(sorted(extremes), dtype=int)
+
+    values = df[color_by].to_numpy(dtype=float)
+    strata = pd.qcut(
+        pd.Series(values).rank(method='first'), strata_count, labels=False)
+    strata = np.nan_to_num(strata.to_numpy(), nan=strata_count).astype(int)
+
+    budget = max(max_rows - len(extremes), 0)
+    stratum_ids, stratum_counts = np.unique(strata, return_counts=True)
+    # the budget is split in proportion to the sizes of the strata and the rows
+    # that rounding down leaves over go to the largest remainders, so the sample
+    # has exactly budget rows besides the extremes
+    shares = budget * stratum_counts / row_count
+    sizes = np.floor(shares).astype(int)
+    sizes[np.argsort(sizes - shares, kind='stable')[:budget - sizes.sum()]] += 1
+    samples = [extremes]
+    for stratum, size in zip(stratum_ids, sizes):
+        if size > 0:
+            members = np.flatnonzero(strata == stratum)
+            samples.append(rng.choice(members, size=size, replace=False))
+    return np.unique(np.concatenate(samples))
+
+
+def create_parallel_coordinates(
+        df: pd.DataFrame, color_by: str,
+        labels: Dict[str, str]) -> Tuple[go.Figure, Optional[np.ndarray]]:
+    """Create the parallel coordinates figure.
+
+    Returns the figure and the positions of the rows that are drawn, or None if
+    all rows are drawn.
+    """
+    # plotly.express is slow to import, so it is only imported when a figure is
+    # created
+    import plotly.express as px
+
+    rows = sample_rows(df, color_by)
+    if rows is None:
+        fig = px.parallel_coordinates(df, color=color_by, labels=labels)
+        return compact_figure(fig), None
+
+    dimensions = [col_name for col_name, col_series in df.items()
+                  if pd.api.types.is_numeric_dtype(col_series)]
+    fig = px.parallel_coordinates(
+        df.iloc[rows], dimensions=dimensions, color=color_by, labels=labels)
+    # the axes and the colors use the range of all rows
+    for col_name, dimension in zip(dimensions, fig.data[0].dimensions):
+        dimension.range = [df[col_name].min(), df[col_name].max()]
+    fig.update_layout(
+        coloraxis_cmin=df[color_by].min(),
+        coloraxis_cmax=df[color_by].max(),
+        title_text=f'Showing a sample of {len(rows)} of {len(df)} designs',
+        title_font_size=12
+    )
+    return compact_figure(fig), rows
+
+
+def compact_figure(fig: go.Figure) -> go.Figure:
+    """Make the parallel coordinates figure smaller to send.
+
+    The values of the dimensions and the colors are downcast to typed arrays
+    with encoding.typed_array and only the parts of the template that are used
+    by parallel coordinates are kept.
+    """
+    parcoords = fig.data[0]
+    for dimension in parcoords.dimensions:
+        dimension.values = typed_array(dimension.values)
+    if parcoords.line.color is not None:
+        parcoords.line.color = typed_array(parcoords.line.color)
+    template = fig.layout.template
+    fig.layout.template = go.layout.Template(
+        layout=template.layout, data={'parcoords': template.data.parcoords})
+    return fig
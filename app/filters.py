@@ -0,0 +1,64 @@
+"""Module for filtering a dataset by the selections in the parallel coordinates."""
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+
+from indexes import ColumnIndex, range_rows
+
+
+def selection_ranges(selection) -> np.ndarray:
+    """Get the ranges of a selection as an array of shape (n, 2).
+
+    The selection of a column in the parallel coordinates is either a single
+    range, e.g., [[3.3, 5.8]], or a list of ranges, e.g.,
+    [[[127.0, 341.4], [627.3, 739.2]]]. Each range is sorted so that the
+    minimum comes first.
+    """
+    ranges = np.asarray(selection, dtype=float).reshape(-1, 2)
+    return np.sort(ranges, axis=1)
+
+
+def compile_mask(
+        df: pd.DataFrame, active_filters: Dict,
+        indexes: Dict[str, ColumnIndex] = None) -> Optional[np.ndarray]:
+    """Compile the active filters into one boolean mask for the rows of df.
+
+    The ranges of a column are combined with OR and the columns are combined
+    with AND. A column with the value None has had its selection removed and is
+    ignored. None is returned if there are no selections.
+
+    If the column has a sorted index in indexes the rows of each range are
+    found with a binary search instead of a scan of the column.
+    """
+    indexes = indexes or {}
+    mask = None
+    for col, selection in active_filters.items():
+        if not selection or col not in df.columns:
+            continue
+        col_mask = np.zeros(len(df), dtype=bool)
+        if col in indexes:
+            for minimum, maximum in selection_ranges(selection):
+                col_mask[range_rows(indexes[col], minimum, maximum)] = True
+        else:
+            values = df[col].to_numpy()
+            for minimum, maximum in selection_ranges(selection):
+                col_mask |= (values >= minimum) & (values <= maximum)
+        if mask is None:
+            mask = col_mask
+        else:
+            mask &= col_mask
+
+    return mask
+
+
+def filter_indices(
+        df: pd.DataFrame, active_filters: Dict,
+        indexes: Dict[str, ColumnIndex] = None) -> Optional[np.ndarray]:
+    """Get the row positions in df that pass the active filters.
+
+    None is returned if there are no selections, i.e., all rows are active.
+    """
+    mask = compile_mask(df, active_filters, indexes)
+    if mask is None:
+        return None
+    return np.flatnonzero(mask)
@@ -1,5 +1,17 @@
 """Module with helper functions."""
+import hashlib
+import os
+import re
+import shutil
+import threading
+from functools import lru_cache
+from pathlib import Path
 import pandas as pd
+import psutil
+
+# the names of the files of temp_path, with the id of the process that writes
+# them
+_temp_name = re.compile(r'^\..+\.(\d+)\.\d+(\.part|\.old)?$')
 
 
 def process_dataframe(df: pd.DataFrame):
@@ -25,3 +37,52 @@ def process_dataframe(df: pd.DataFrame):
             image_columns.append(col_name)
 
     return labels, parameters, input_columns, output_columns, image_columns
+
+
+@lru_cache(maxsize=65536)
+def _file_hash(path: str, mtime_ns: int, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_hash(file_path: Path) -> str:
+    """Get the SHA-256 hash of the content of a file.
+
+    The hash is only computed again if the modification time or the size of
+    the file has changed. The hashes of the most recently used files are kept.
+    """
+    file_path = Path(file_path)
+    stat = file_path.stat()
+    return _file_hash(file_path.as_posix(), stat.st_mtime_ns, stat.st_size)
+
+
+def temp_path(path: Path, suffix: str = '') -> Path:
+    """Get the path of a hidden temporary file or folder next to path.
+
+    A file is written to its temporary path and renamed when it is complete.
+    The name has the process and the thread that writes it, so writers do not
+    share a temporary file, and remove_stale_temp_files can remove the file if
+    the process no longer runs.
+    """
+    return path.with_name(
+        f'.{path.name}.{os.getpid()}.{threading.get_ident()}{suffix}')
+
+
+def remove_stale_temp_files(folder: Path, recursive: bool = True):
+    """Remove the temporary files and folders of temp_path in folder, and the
+    temporary folders of folder itself, that were left by a process that no
+    longer runs, e.g., an import that was cancelled."""
+    paths = list(folder.parent.glob(f'.{folder.name}.*'))
+    if folder.is_dir():
+        paths.extend(folder.rglob('.*') if recursive else folder.glob('.*'))
+    for path in paths:
+        match = _temp_name.match(path.name)
+        if match is None or psutil.pid_exists(int(match.group(1))):
+            continue
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
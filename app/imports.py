@@ -0,0 +1,136 @@
+"""Module for the cache of the artifacts that are imported from Pollination.
+
+An import is identified by the key of the artifact and the hash of its content
+as it comes from the upload component, i.e., the base64 string, so the cache can
+be checked without decoding the upload. A manifest records the files that were
+written for the import. If the files are unchanged a repeated import is a cache
+hit and the upload is neither decoded, extracted nor downloaded again.
+
+The files of an import are written to a temporary path and renamed when they
+are complete, and an import holds a file lock, so two workers that import the
+same artifact do not write the same files at the same time. The temporary files
+of an import that failed are removed. An import that is cancelled is killed, so
+its temporary files are removed by the next import of the same folder.
+"""
+import hashlib
+import json
+import os
+import shutil
+import zipfile
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from config import pollination_path
+from helper import temp_path
+from metrics import count_cache
+
+manifest_folder = pollination_path.joinpath('.imports')
+
+
+def import_digest(key: str, value: str) -> str:
+    """Get the hash of an import from the artifact key and the base64 content."""
+    digest = hashlib.sha256(key.encode())
+    digest.update(b'\0')
+    digest.update(value.encode())
+    return digest.hexdigest()
+
+
+def _file_stats(folder: Path, files: Iterable[str]) -> Dict[str, list]:
+    stats = {}
+    for file in files:
+        stat = folder.joinpath(file).stat()
+        stats[file] = [stat.st_size, stat.st_mtime_ns]
+    return stats
+
+
+def read_manifest(digest: str, folder: Path) -> Optional[Dict]:
+    """Get the manifest of an import if all the files of the import are in
+    folder and unchanged.
+
+    None is returned if the import is not in the cache.
+    """
+    manifest = _read_manifest(digest, folder)
+    count_cache('imports', manifest is not None)
+    return manifest
+
+
+def _read_manifest(digest: str, folder: Path) -> Optional[Dict]:
+    manifest_file = manifest_folder.joinpath(f'{digest}.json')
+    if not manifest_file.exists():
+        return None
+    manifest = json.loads(manifest_file.read_text())
+    if manifest['folder'] != folder.relative_to(pollination_path).as_posix():
+        return None
+    try:
+        if _file_stats(folder, manifest['files']) != manifest['files']:
+            return None
+    except FileNotFoundError:
+        return None
+    return manifest
+
+
+def write_manifest(
+        digest: str, key: str, folder: Path, files: Iterable[str]) -> Dict:
+    """Write the manifest of an import.
+
+    Args:
+        digest: The hash of the import.
+        key: The key of the artifact.
+        folder: The folder the files were written to.
+        files: The paths of the files relative to folder.
+    """
+    manifest = {
+        'key': key,
+        'folder': folder.relative_to(pollination_path).as_posix(),
+        'files': _file_stats(folder, files)
+    }
+    manifest_folder.mkdir(parents=True, exist_ok=True)
+    manifest_file = manifest_folder.joinpath(f'{digest}.json')
+    temp_file = temp_path(manifest_file)
+    temp_file.write_text(json.dumps(manifest))
+    os.replace(temp_file, manifest_file)
+    return manifest
+
+
+def write_file(content: bytes, file_path: Path):
+    """Write the decoded content of an upload to file_path."""
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = temp_path(file_path)
+    try:
+        temp_file.write_bytes(content)
+        os.replace(temp_file, file_path)
+    finally:
+        temp_file.unlink(missing_ok=True)
+
+
+def extract_zip(content: bytes, folder: Path) -> List[str]:
+    """Extract the decoded content of an uploaded zip file to folder.
+
+    The zip file is extracted to a temporary folder that replaces folder when
+    the extraction is done.
+
+    Returns:
+        The paths of the extracted files relative to folder.
+    """
+    folder.parent.mkdir(parents=True, exist_ok=True)
+    temp_folder = temp_path(folder)
+    old_folder = folder.with_name(f'{temp_folder.name}.old')
+    shutil.rmtree(temp_folder, ignore_errors=True)
+    try:
+        with zipfile.ZipFile(BytesIO(content), 'r') as zip_file:
+            zip_file.extractall(temp_folder)
+            files = [info.filename for info in zip_file.infolist()
+                     if not info.is_dir()]
+        if folder.exists():
+            os.replace(folder, old_folder)
+        try:
+            os.replace(temp_folder, folder)
+        except BaseException:
+            if old_folder.exists():
+                os.replace(old_folder, folder)
+            raise
+    finally:
+        shutil.rmtree(temp_folder, ignore_errors=True)
+        shutil.rmtree(old_folder, ignore_errors=True)
+    return files
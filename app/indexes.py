@@ -0,0 +1,93 @@
+"""Module for the sorted indexes of the numeric columns of a dataset.
+
+An index is built once when a project is loaded. Range selections are then
+answered with a binary search and sorting a subset of rows is a walk over the
+precomputed order instead of a new sort.
+"""
+from typing import Dict, NamedTuple, Optional
+import numpy as np
+import pandas as pd
+
+
+class ColumnIndex(NamedTuple):
+    """Sorted index of a column.
+
+    order: The row positions that sort the column in ascending order. Rows
+        with a NaN value are at the end.
+    values: The values of the column in ascending order.
+    nan_start: The position in order of the first row with a NaN value.
+    """
+    order: np.ndarray
+    values: np.ndarray
+    nan_start: int
+
+
+def build_index(values: np.ndarray) -> ColumnIndex:
+    """Build the sorted index of the values of a column."""
+    values = np.asarray(values, dtype=float)
+    order = np.argsort(values, kind='stable')
+    sorted_values = values[order]
+    nan_start = int(np.searchsorted(sorted_values, np.nan))
+    return ColumnIndex(order, sorted_values, nan_start)
+
+
+def build_indexes(df: pd.DataFrame) -> Dict[str, ColumnIndex]:
+    """Build the sorted index of each numeric column in df."""
+    indexes = {}
+    for col_name, col_series in df.items():
+        if pd.api.types.is_numeric_dtype(col_series) and \
+                not pd.api.types.is_bool_dtype(col_series):
+            indexes[col_name] = build_index(col_series.to_numpy())
+
+    return indexes
+
+
+def range_rows(index: ColumnIndex, minimum: float, maximum: float) -> np.ndarray:
+    """Get the row positions with a value between minimum and maximum.
+
+    Both minimum and maximum are inclusive.
+    """
+    start = np.searchsorted(index.values[:index.nan_start], minimum, side='left')
+    end = np.searchsorted(index.values[:index.nan_start], maximum, side='right')
+    return index.order[start:end]
+
+
+def sort_rows(
+        index: ColumnIndex, rows: Optional[np.ndarray] = None,
+        ascending: bool = True) -> np.ndarray:
+    """Sort row positions by the column of the index.
+
+    If rows is None all rows are sorted. Rows with a NaN value are always put
+    last.
+    """
+    order = index.order
+    if not ascending:
+        order = np.concatenate(
+            [order[:index.nan_start][::-1], order[index.nan_start:]])
+    if rows is None:
+        return order
+    active = np.zeros(len(order), dtype=bool)
+    active[rows] = True
+    return order[active[order]]
+
+
+def order_rows(
+        df: pd.DataFrame, indexes: Dict[str, ColumnIndex],
+        column: Optional[str], rows: Optional[np.ndarray] = None,
+        ascending: bool = True) -> np.ndarray:
+    """Get the row positions of rows sorted by a column of df.
+
+    The index of the column is used if there is one. Other columns are sorted
+    with a stable sort. If column is None the rows are returned in their order.
+    Rows with a NaN value are always put last.
+    """
+    if column in indexes:
+        return sort_rows(indexes[column], rows, ascending=ascending)
+    positions = np.arange(len(df))
+    if rows is not None:
+        positions = positions[rows]
+    if column:
+        sorted_values = df[column].iloc[positions].reset_index(
+            drop=True).sort_values(ascending=ascending, kind='stable')
+        positions = positions[sorted_values.index.to_numpy()]
+    return positions
@@ -0,0 +1,15 @@
+"""Module for the background jobs of the app.
+
+Long running callbacks, e.g., the import of a Pollination project, run as Dash
+background callbacks in a separate process, so the web worker is free to serve
+other requests while the job runs. The jobs and their progress are kept in a
+diskcache in the shared cache folder, so any worker can poll a job.
+"""
+import diskcache
+from dash import DiskcacheManager
+
+from cache import private_folder
+from config import cache_path
+
+background_manager = DiskcacheManager(
+    diskcache.Cache(private_folder(cache_path.joinpath('jobs')).as_posix()))
@@ -0,0 +1,53 @@
+"""Module for the locks that are shared by the worker processes of the app.
+
+A lock is an exclusive flock on a file in the locks folder of the shared cache,
+so it works across the gunicorn workers and across the threads of a worker.
+Locks that are taken for many names, e.g., one for every downloaded file, are
+striped over a fixed number of lock files, so the locks folder does not grow
+with the number of names.
+fcntl is only available on POSIX. Elsewhere a lock is only shared by the threads
+of one process.
+"""
+import hashlib
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from config import cache_path
+
+lock_path = cache_path.joinpath('locks')
+# number of lock files that the striped locks share
+lock_stripes = 64
+
+_thread_locks = {}
+_thread_locks_lock = threading.Lock()
+
+
+@contextmanager
+def file_lock(name: str, striped: bool = False):
+    """Hold the lock with a name while in the context.
+
+    If striped is True, the lock shares its file with the other striped locks
+    whose names have the same hash modulo lock_stripes.
+    """
+    key = hashlib.sha256(name.encode()).hexdigest()[:32]
+    if striped:
+        key = f'stripe-{int(key, 16) % lock_stripes}'
+    if fcntl is None:
+        with _thread_locks_lock:
+            lock = _thread_locks.setdefault(key, threading.Lock())
+        with lock:
+            yield
+        return
+
+    lock_path.mkdir(parents=True, exist_ok=True)
+    with open(lock_path.joinpath(f'{key}.lock'), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
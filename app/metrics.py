@@ -0,0 +1,209 @@
+"""Module for the metrics of the app.
+
+The latency and the request and response sizes of every callback request are
+recorded by hooks on the Flask server, labelled with the outputs of the
+callback. The registry and the caches count their hits and misses. The metrics
+are served in the Prometheus text format on /metrics and every callback request
+can also be written as one JSON line to a log file.
+
+The metrics are kept in memory per process, so every worker has its own.
+"""
+import bisect
+import json
+import logging
+import re
+import threading
+import time
+from typing import Dict, Hashable, Iterable, Tuple
+
+from flask import Flask, Response, g, has_request_context, request
+
+from config import metrics_log
+
+# buckets of the histograms in seconds and in bytes
+latency_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+size_buckets = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_callback_path = '/_dash-update-component'
+_lock = threading.Lock()
+
+
+class Counter:
+    """A counter with labels."""
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._values: Dict[Tuple[str], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with _lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[Tuple[str, Tuple[str], Tuple[str], float]]:
+        with _lock:
+            values = dict(self._values)
+        for labels, value in values.items():
+            yield self.name, self.label_names, labels, value
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} counter']
+        lines.extend(_sample_line(*sample) for sample in self.samples())
+        return '\n'.join(lines)
+
+
+class Histogram:
+    """A histogram with labels and fixed buckets."""
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str],
+                 buckets: Tuple[float]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        # the counts of the buckets, the sum and the count keyed by the labels
+        self._values: Dict[Tuple[str], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        with _lock:
+            entry = self._values.setdefault(
+                labels, [[0] * (len(self.buckets) + 1), 0.0])
+            entry[0][bisect.bisect_left(self.buckets, value)] += 1
+            entry[1] += value
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} histogram']
+        with _lock:
+            values = {k: (list(v[0]), v[1]) for k, v in self._values.items()}
+        label_names = self.label_names + ('le',)
+        for labels, (counts, total) in values.items():
+            cumulative = 0
+            for bucket, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(_sample_line(
+                    f'{self.name}_bucket', label_names, labels + (str(bucket),),
+                    cumulative))
+            lines.append(_sample_line(
+                f'{self.name}_sum', self.label_names, labels, total))
+            lines.append(_sample_line(
+                f'{self.name}_count', self.label_names, labels, cumulative))
+        return '\n'.join(lines)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _sample_line(name, label_names, labels, value) -> str:
+    if label_names:
+        pairs = ','.join(
+            f'{n}="{_escape(str(v))}"' for n, v in zip(label_names, labels))
+        name = f'{name}{{{pairs}}}'
+    return f'{name} {value}'
+
+
+callback_latency = Histogram(
+    'design_explorer_callback_latency_seconds',
+    'Latency of the callback requests.', ('output',), latency_buckets)
+callback_request_size = Histogram(
+    'design_explorer_callback_request_bytes',
+    'Size of the bodies of the callback requests.', ('output',), size_buckets)
+callback_response_size = Histogram(
+    'design_explorer_callback_response_bytes',
+    'Size of the bodies of the callback responses after compression.',
+    ('output',), size_buckets)
+callback_errors = Counter(
+    'design_explorer_callback_errors_total',
+    'Callback requests with a server error.', ('output',))
+dataset_builds = Counter(
+    'design_explorer_dataset_builds_total',
+    'DataFrames that were built from the data.csv file of a project.', ())
+cache_requests = Counter(
+    'design_explorer_cache_requests_total',
+    'Lookups of the caches. The hit ratio of a cache is hit / (hit + miss).',
+    ('cache', 'result'))
+
+_metrics = (callback_latency, callback_request_size, callback_response_size,
+            callback_errors, dataset_builds, cache_requests)
+
+
+def count_cache(cache: str, hit: bool):
+    """Count a lookup of a cache."""
+    cache_requests.inc(cache, 'hit' if hit else 'miss')
+
+
+def count_cache_once(cache: str, key: Hashable, hit: bool):
+    """Count the first lookup of key in a cache in a request. A cache that a
+    callback looks up several times for the same key is counted once per
+    request. The lookups outside a request are all counted."""
+    if has_request_context():
+        counted = g.setdefault('metrics_lookups', set())
+        if (cache, key) in counted:
+            return
+        counted.add((cache, key))
+    count_cache(cache, hit)
+
+
+def callback_output(output: str) -> str:
+    """Get the label of a callback from its output, without the hashes of the
+    outputs that allow duplicates."""
+    return re.sub(r'@[0-9a-f]+', '', output or 'unknown')
+
+
+def render_metrics() -> str:
+    """Get all the metrics in the Prometheus text format."""
+    return '\n'.join(metric.render() for metric in _metrics) + '\n'
+
+
+def _create_logger() -> logging.Logger:
+    logger = logging.getLogger('design_explorer.metrics')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = logging.StreamHandler() if metrics_log == '-' else \
+        logging.FileHandler(metrics_log)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    return logger
+
+
+def init_metrics(server: Flask):
+    """Add the hooks that record the callback requests to server and add the
+    /metrics route."""
+    logger = _create_logger() if metrics_log else None
+
+    @server.before_request
+    def start_timer():
+        if request.path.endswith(_callback_path):
+            g.metrics_start = time.perf_counter()
+
+    @server.after_request
+    def record_callback(response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+        latency = time.perf_counter() - start
+        body = request.get_json(silent=True) or {}
+        output = callback_output(body.get('output'))
+        request_size = request.content_length or 0
+        response_size = response.calculate_content_length() or 0
+        callback_latency.observe(latency, output)
+        callback_request_size.observe(request_size, output)
+        callback_response_size.observe(response_size, output)
+        if response.status_code >= 500:
+            callback_errors.inc(output)
+        if logger is not None:
+            logger.info(json.dumps({
+                'time': time.time(), 'output': output,
+                'status': response.status_code,
+                'latency_ms': round(latency * 1000, 3),
+                'request_bytes': request_size,
+                'response_bytes': response_size}))
+        return response
+
+    @server.route('/metrics')
+    def serve_metrics():
+        return Response(render_metrics(),
+                        mimetype='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,227 @@
+"""Module for the server-side project registry.
+
+Samples and projects imported from Pollination are loaded by the same loader
+into a ProjectBundle. The browser only holds the id of the dataset of a project.
+The callbacks resolve the id to the bundle kept in memory on the server. The
+bundles are held in a bounded LRU cache. A bundle is loaded again from its CSV
+file if it has been evicted or if the CSV file has changed.
+"""
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from config import app_path, assets_path, pollination_path, dataset_cache_size
+from datafile import read_data_csv
+from figures import create_parallel_coordinates
+from helper import process_dataframe
+from indexes import ColumnIndex, build_indexes
+from metrics import count_cache_once, dataset_builds
+
+
+class LRUCache:
+    """A thread-safe mapping that keeps at most maxsize items.
+
+    The least recently used item is dropped when a new item is added to a full
+    cache.
+    """
+
+    def __init__(self, maxsize: int = 8):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+class ProjectBundle(NamedTuple):
+    """A loaded project.
+
+    figure_rows are the positions of the rows that are drawn in the parallel
+    coordinates figure, or None if all rows are drawn.
+
+    memo is a dictionary for values that are derived from the frame, e.g., the
+    colors of a column. It is dropped together with the bundle.
+    """
+    dataset_id: str
+    project_folder: str
+    source_stamp: Tuple[int, int]
+    frame: pd.DataFrame
+    labels: Dict[str, str]
+    parameters: Dict[str, Dict]
+    img_column: Optional[str]
+    color_by: str
+    sort_by: str
+    figure: go.Figure
+    figure_rows: Optional[np.ndarray]
+    columns: List[Dict]
+    indexes: Dict[str, ColumnIndex]
+    memo: Dict
+
+
+_projects = LRUCache(maxsize=dataset_cache_size)
+
+
+def dataset_id_from_path(csv_path: Path) -> str:
+    """Get the dataset id of a CSV file.
+
+    The id is the path of the CSV file relative to the app folder, e.g.,
+    assets/samples/box/data.csv.
+    """
+    return Path(csv_path).resolve().relative_to(app_path.resolve()).as_posix()
+
+
+def _csv_path_from_dataset_id(dataset_id: str) -> Path:
+    """Get the path of the CSV file of a dataset id.
+
+    Only files in the samples folder or in the pollination folder can be used
+    as a dataset.
+    """
+    csv_path = app_path.joinpath(dataset_id).resolve()
+    for folder in (assets_path.joinpath('samples'), pollination_path):
+        if csv_path.is_relative_to(folder.resolve()):
+            return csv_path
+    raise ValueError(f'Invalid dataset id: {dataset_id}')
+
+
+def _source_stamp(csv_path: Path) -> Tuple[int, int]:
+    stat = csv_path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def table_columns(parameters: Dict[str, Dict]) -> List[Dict]:
+    """Get the columns of the table from the parameters."""
+    columns = []
+    for value in parameters.values():
+        if value['type'] != 'img':
+            columns.append(
+                {'id': value['label'],
+                 'name': value['display_name']})
+        else:
+            columns.append(
+                {'id': value['label'],
+                 'name': value['display_name'],
+                 'hidden': True})
+    return columns
+
+
+def _create_bundle(dataset_id: str, csv_path: Path) -> ProjectBundle:
+    source_stamp = _source_stamp(csv_path)
+    df = read_data_csv(csv_path)
+
+    labels, parameters, input_columns, output_columns, image_columns = \
+        process_dataframe(df)
+
+    # color and sort by first output column, or first input column
+    if output_columns:
+        color_by = output_columns[0]
+        sort_by = output_columns[0]
+    else:
+        color_by = input_columns[0]
+        sort_by = input_columns[0]
+
+    fig, figure_rows = create_parallel_coordinates(df, color_by, labels)
+
+    img_column = image_columns[0] if image_columns else None
+
+    return ProjectBundle(
+        dataset_id=dataset_id,
+        project_folder=Path(dataset_id).parent.as_posix(),
+        source_stamp=source_stamp,
+        frame=df,
+        labels=labels,
+        parameters=parameters,
+        img_column=img_column,
+        color_by=color_by,
+        sort_by=sort_by,
+        figure=fig,
+        figure_rows=figure_rows,
+        columns=table_columns(parameters),
+        indexes=build_indexes(df),
+        memo={}
+    )
+
+
+def load_project(csv_path: Path) -> ProjectBundle:
+    """Load the project of a CSV file.
+
+    The bundle is taken from the registry if the CSV file has not changed since
+    it was loaded.
+    """
+    return get_project(dataset_id_from_path(csv_path))
+
+
+def get_project(dataset_id: str) -> ProjectBundle:
+    """Get the project bundle of a dataset id.
+
+    The lookup is counted once per request, since a callback gets the bundle
+    through several accessors, e.g., get_dataset and get_memo.
+    """
+    csv_path = _csv_path_from_dataset_id(dataset_id)
+    bundle = _projects.get(dataset_id)
+    hit = bundle is not None and bundle.source_stamp == _source_stamp(csv_path)
+    count_cache_once('projects', dataset_id, hit)
+    if not hit:
+        bundle = _create_bundle(dataset_id, csv_path)
+        dataset_builds.inc()
+        _projects.put(dataset_id, bundle)
+    return bundle
+
+
+def get_dataset(dataset_id: str) -> pd.DataFrame:
+    """Get the DataFrame of a dataset id."""
+    return get_project(dataset_id).frame
+
+
+def get_indexes(dataset_id: str) -> Dict[str, ColumnIndex]:
+    """Get the sorted indexes of the numeric columns of a dataset id."""
+    return get_project(dataset_id).indexes
+
+
+def get_memo(dataset_id: str) -> Dict:
+    """Get the dictionary for values derived from a dataset id."""
+    return get_project(dataset_id).memo
+
+
+def get_image_row(dataset_id: str, img_column: str, image: str) -> Optional[int]:
+    """Get the position of the first row of a dataset id with image in
+    img_column, or None if there is no such row.
+
+    The index from image to row is built on the first lookup and kept with the
+    project.
+    """
+    memo = get_memo(dataset_id)
+    key = ('image_rows', img_column)
+    if key not in memo:
+        images = get_dataset(dataset_id)[img_column].tolist()
+        # the first row of an image wins
+        memo[key] = {
+            image: row for row, image in reversed(list(enumerate(images)))}
+    return memo[key].get(image)
@@ -1,10 +1,31 @@
-"""Module for samples."""
+"""Module for samples.
+
+The first page of the app shows a sample project. Everything the layout needs
+from the sample, i.e., the figure, the schema of the table and the first page
+of the images grid, is written to a .sample.json file next to the data.csv file
+of the sample, so the app does not build the DataFrame and the figure of the
+sample when it starts. The files are built with the Docker image by running
+this module and they are loaded on first use. A file is built again if the CSV
+file or the page sizes have changed.
+
+Usage:
+    python samples.py
+"""
+import json
+import os
+from functools import lru_cache
 from pathlib import Path
-import pandas as pd
-import plotly.express as px
+from typing import Dict, List, NamedTuple, Optional
+
+import plotly.io.json as pio_json
 
-from containers import create_images_grid_children
-from helper import process_dataframe
+from colors import column_colors
+from config import assets_path, images_page_size, table_page_size, \
+    thumbnail_path, thumbnail_size
+from helper import file_hash, temp_path
+from indexes import sort_rows
+from registry import load_project
+from thumbnails import get_thumbnails
 
 
 sample_alias = {
@@ -22,41 +43,149 @@ sample_alias = {
         }
 }
 
+# the version of the format of the .sample.json files
+_sample_version = 1
+
+
+class SampleLayout(NamedTuple):
+    """The data of a sample project that the initial layout needs.
+
+    images_grid has the images, the border colors and the thumbnails of the
+    first page of the images grid, or it is None if the sample has no images.
+    images_grid_rows is the data of images-grid-rows.
+    """
+    dataset_id: str
+    project_folder: str
+    labels: Dict[str, str]
+    parameters: Dict[str, Dict]
+    img_column: Optional[str]
+    color_by: str
+    sort_by: str
+    figure: Dict
+    columns: List[Dict]
+    df_columns: List[str]
+    row_count: int
+    table_data: List[Dict]
+    images_grid: Optional[Dict]
+    images_grid_rows: Optional[Dict]
+
+
+def _sample_csv(sample_identifier: str) -> Path:
+    return assets_path.joinpath('samples', sample_identifier, 'data.csv')
+
+
+def _sample_cache_path(sample_identifier: str) -> Path:
+    return _sample_csv(sample_identifier).with_name('.sample.json')
+
+
+def _sample_stamp(csv_path: Path) -> Dict:
+    """Get what a .sample.json file depends on besides the code."""
+    return {'version': _sample_version, 'csv': file_hash(csv_path),
+            'images_page_size': images_page_size,
+            'table_page_size': table_page_size,
+            'thumbnail_size': thumbnail_size}
+
+
+def build_sample_layout(sample_identifier: str) -> SampleLayout:
+    """Build the layout data of a sample project from its bundle."""
+    bundle = load_project(_sample_csv(sample_identifier))
+    df = bundle.frame
+
+    images_grid = None
+    images_grid_rows = None
+    if bundle.img_column:
+        page_rows = sort_rows(
+            bundle.indexes[bundle.sort_by], ascending=False)[:images_page_size]
+        images = df[bundle.img_column].to_numpy()[page_rows].tolist()
+        thumbnails = get_thumbnails(
+            bundle.dataset_id, bundle.project_folder, images)
+        images_grid = {
+            'images': images,
+            'border_colors': column_colors(
+                bundle.dataset_id, bundle.color_by)[page_rows].tolist(),
+            'thumbnails': {image: thumbnails[image] for image in images
+                           if image in thumbnails}
+        }
+        images_grid_rows = {
+            'dataset_id': bundle.dataset_id, 'rows': page_rows.tolist()}
+
+    return SampleLayout(
+        dataset_id=bundle.dataset_id,
+        project_folder=bundle.project_folder,
+        labels=bundle.labels,
+        parameters=bundle.parameters,
+        img_column=bundle.img_column,
+        color_by=bundle.color_by,
+        sort_by=bundle.sort_by,
+        figure=bundle.figure.to_plotly_json(),
+        columns=bundle.columns,
+        df_columns=df.columns.tolist(),
+        row_count=len(df),
+        table_data=df.iloc[:table_page_size].to_dict('records'),
+        images_grid=images_grid,
+        images_grid_rows=images_grid_rows
+    )
+
+
+def _read_sample_layout(sample_identifier: str) -> Optional[SampleLayout]:
+    """Read the .sample.json file of a sample. None is returned if there is no
+    file, if it is out of date or if a thumbnail of it is missing."""
+    path = _sample_cache_path(sample_identifier)
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    if data.get('stamp') != _sample_stamp(_sample_csv(sample_identifier)):
+        return None
+    try:
+        layout = SampleLayout(**data['layout'])
+    except TypeError:
+        return None
+    if layout.images_grid and not all(
+            thumbnail_path.joinpath(name).exists()
+            for name in layout.images_grid['thumbnails'].values()):
+        return None
+    return layout
+
 
-def load_sample_project(sample_identifier: str = sample_alias['daylight-factor']['id']):
-    project_folder = f'assets/samples/{sample_identifier}'
-    csv = Path(__file__).parent.joinpath('assets', 'samples', sample_identifier, 'data.csv')
-    df = pd.read_csv(csv)
-    df_records = df.to_dict('records')
+def write_sample_layout(sample_identifier: str) -> SampleLayout:
+    """Build the layout data of a sample and write it to its .sample.json
+    file. A folder that is not writable is ignored."""
+    layout = build_sample_layout(sample_identifier)
+    path = _sample_cache_path(sample_identifier)
+    content = pio_json.to_json_plotly({
+        'stamp': _sample_stamp(_sample_csv(sample_identifier)),
+        'layout': layout._asdict()})
+    temp_file = temp_path(path)
+    try:
+        temp_file.write_text(content)
+        os.replace(temp_file, path)
+    except OSError:
+        temp_file.unlink(missing_ok=True)
+    # the layout as it is read back, e.g., with NaN values as None
+    return SampleLayout(**json.loads(content)['layout'])
 
-    labels, parameters, input_columns, output_columns, image_columns = \
-        process_dataframe(df)
 
-    # color by first output column, or first input column
-    if output_columns:
-        color_by = output_columns[0]
-        sort_by = output_columns[0]
-    else:
-        color_by = input_columns[0]
-        sort_by = output_columns[0]
+@lru_cache(maxsize=None)
+def load_sample_layout(
+        sample_identifier: str = sample_alias['daylight-factor']['id']
+        ) -> SampleLayout:
+    """Load the layout data of a sample project.
 
-    fig = px.parallel_coordinates(df, color=color_by, labels=labels)
+    The .sample.json file of the sample is used if it is up to date. Otherwise
+    it is built from the project and written again.
+    """
+    layout = _read_sample_layout(sample_identifier)
+    if layout is None:
+        layout = write_sample_layout(sample_identifier)
+    return layout
 
-    img_column = df.filter(regex=f'^img:').columns[0]
 
-    minimum, maximum = df[color_by].min(), df[color_by].max()
-    sorted_df = df.sort_values(by=sort_by, ascending=False)
-    sorted_df_records = sorted_df.to_dict('records')
-    images_grid_children = create_images_grid_children(
-        sorted_df_records, color_by, minimum, maximum, img_column, project_folder)
+def main():
+    for sample in sample_alias.values():
+        write_sample_layout(sample['id'])
+        print(_sample_cache_path(sample['id']))
 
-    columns = []
-    for value in parameters.values():
-        if value['type'] != 'img':
-            columns.append({'id': value['label'], 'name': value['display_name']})
-        else:
-            columns.append(
-                {'id': value['label'], 'name': value['display_name'], 'hidden': True})
 
-    return (parameters, color_by, fig, images_grid_children, sort_by, project_folder,
-            df_records, df, labels, img_column, columns)
+if __name__ == '__main__':
+    main()
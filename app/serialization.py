@@ -0,0 +1,61 @@
+"""Module for the JSON serialization of the responses of the app.
+
+Dash serializes the layout and the callback responses with
+plotly.io.json.to_json_plotly. With the orjson engine, plotly first tries
+orjson and falls back to converting the whole object to JSON-compatible types
+in Python if orjson fails, which it does for every response with Dash
+components. Here orjson converts the components with their to_plotly_json
+method instead, so the responses are serialized by orjson in one pass. NumPy
+arrays are serialized natively. Anything orjson cannot serialize is passed on
+to plotly.
+
+With JSON_ENGINE=json, Dash serializes the responses with plotly as before.
+"""
+import orjson
+import plotly.io.json as pio_json
+
+from config import json_engine
+
+# the characters that plotly escapes, so the JSON is safe in a script tag
+_unsafe_characters = (('<', '\\u003c'), ('>', '\\u003e'), ('/', '\\u002f'),
+                      ('\u2028', '\\u2028'), ('\u2029', '\\u2029'))
+
+_to_json_plotly = pio_json.to_json_plotly
+
+
+def _default(value):
+    """Convert a value that orjson does not serialize, e.g., a Dash component,
+    a figure or a pandas Index."""
+    if hasattr(value, 'to_plotly_json'):
+        return value.to_plotly_json()
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError
+
+
+def to_json(value, pretty: bool = False, engine: str = None) -> str:
+    """Serialize a value like plotly.io.json.to_json_plotly, with orjson if
+    it can serialize the value."""
+    if pretty or (engine or json_engine) == 'json':
+        return _to_json_plotly(value, pretty=pretty, engine=engine)
+    try:
+        text = orjson.dumps(
+            value, default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        ).decode()
+    except TypeError:
+        return _to_json_plotly(value, engine=engine)
+    for unsafe, safe in _unsafe_characters:
+        if unsafe in text:
+            text = text.replace(unsafe, safe)
+    return text
+
+
+def init_serialization():
+    """Serialize the responses of Dash with to_json.
+
+    Dash imports to_json_plotly from plotly.io.json for every response, so it
+    is replaced there. plotly itself uses plotly.io._json and is not changed.
+    """
+    if json_engine != 'json':
+        pio_json.to_json_plotly = to_json
@@ -0,0 +1,159 @@
+"""Module for serving the images of the projects with HTTP caching.
+
+The images are served with an ETag, so a browser can revalidate an image and get
+a 304 response, and with support for Range requests. If the URL has a v query
+parameter that matches the content hash of the file the image is cached as
+immutable for a year. A precompressed variant of a file (file.br or file.gz) is
+served instead of the file if the browser accepts the encoding.
+
+The layout of the app is serialized and compressed once per process and served
+with an ETag, so a repeat visit only revalidates it. The JSON responses of the
+callbacks are compressed with brotli or gzip by Flask-Compress if they are
+larger than COMPRESS_MIN_SIZE.
+"""
+import gzip
+import hashlib
+import mimetypes
+from pathlib import Path
+from urllib.parse import quote
+import brotli
+from flask import Flask, Response, request, send_from_directory
+from flask_compress import Compress
+from werkzeug.security import safe_join
+
+from config import app_path, compress_br_level, compress_gzip_level, \
+    compress_min_size
+from helper import file_hash
+
+immutable_max_age = 365 * 24 * 60 * 60
+
+# precompressed variants in the order of preference
+precompressed_encodings = (('br', '.br'), ('gzip', '.gz'))
+# encodings that responses are compressed with in the order of preference
+compress_encodings = tuple(encoding for encoding, _ in precompressed_encodings)
+
+
+def file_version(file_path: Path) -> str:
+    """Get the version of a file that is used in the v query parameter."""
+    return file_hash(file_path)[:16]
+
+
+def versioned_src(project_folder: str, image: str) -> str:
+    """Get the src of an image with the content hash of the image as version.
+
+    The src is returned without a version if the image does not exist yet.
+    """
+    src = Path(project_folder).joinpath(image).as_posix()
+    file_path = app_path.joinpath(src)
+    if not file_path.is_file():
+        return src
+    return f'{quote(src)}?v={file_version(file_path)}'
+
+
+def _precompressed_variant(directory: Path, path: str):
+    """Get the encoding and the path of a precompressed variant of a file that
+    the browser accepts."""
+    for encoding, suffix in precompressed_encodings:
+        if encoding not in request.accept_encodings:
+            continue
+        variant = safe_join(str(directory), path + suffix)
+        if variant is not None and Path(variant).is_file():
+            return encoding, path + suffix
+    return None, None
+
+
+def send_cached(directory: Path, path: str, immutable: bool = False) -> Response:
+    """Send a file from a directory with caching headers.
+
+    Set immutable to True if the path itself is a content hash. Otherwise the
+    file is only cached as immutable if the v query parameter matches the
+    content of the file, and the browser must revalidate it in any other case.
+    """
+    encoding, variant = _precompressed_variant(directory, path)
+    if variant is not None:
+        mimetype, _ = mimetypes.guess_type(path)
+        response = send_from_directory(
+            directory, variant, mimetype=mimetype or 'application/octet-stream')
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = send_from_directory(directory, path)
+    response.vary.add('Accept-Encoding')
+
+    if not immutable:
+        version = request.args.get('v')
+        if version:
+            file_path = Path(safe_join(str(directory), path))
+            immutable = version == file_version(file_path)
+
+    if immutable:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = immutable_max_age
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+
+    return response
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    """Compress the body of a response with brotli or gzip."""
+    if encoding == 'br':
+        return brotli.compress(body, quality=compress_br_level)
+    return gzip.compress(body, compresslevel=compress_gzip_level)
+
+
+def _accepted_encoding(body: bytes):
+    """Get the encoding that a body is compressed with for the browser, or None
+    if it is sent as it is."""
+    if len(body) < compress_min_size:
+        return None
+    for encoding in compress_encodings:
+        if encoding in request.accept_encodings:
+            return encoding
+    return None
+
+
+def init_compression(server: Flask):
+    """Compress the JSON responses of server, i.e., the callback responses,
+    with Flask-Compress."""
+    server.config.update(
+        COMPRESS_ALGORITHM=list(compress_encodings),
+        COMPRESS_MIMETYPES=['application/json'],
+        COMPRESS_MIN_SIZE=compress_min_size,
+        COMPRESS_BR_LEVEL=compress_br_level,
+        COMPRESS_LEVEL=compress_gzip_level)
+    Compress(server)
+
+
+def init_layout_cache(server: Flask, layout_path: str, serve_layout):
+    """Serve the layout on layout_path from a cache with an ETag.
+
+    serve_layout is the function that serves the layout, e.g., the serve_layout
+    method of the Dash app. It is only called for the first request, so the
+    layout must be the same for every request. The compressed variants of the
+    layout are also created once and each has its own ETag.
+    """
+    cached = {}
+
+    @server.before_request
+    def send_cached_layout():
+        if request.path != layout_path:
+            return None
+        if None not in cached:
+            body = serve_layout().get_data()
+            cached[None] = (body, hashlib.sha256(body).hexdigest()[:32])
+        body, etag = cached[None]
+        encoding = _accepted_encoding(body)
+        if encoding is not None:
+            if encoding not in cached:
+                cached[encoding] = (compress_body(body, encoding),
+                                    f'{etag}:{encoding}')
+            body, etag = cached[encoding]
+        response = Response(body, mimetype='application/json')
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
@@ -0,0 +1,165 @@
+"""Module for the thumbnails of the images grid.
+
+The thumbnails are created the first time an image is requested and they are
+stored in a content-addressed folder, i.e., the name of a thumbnail is the hash
+of the source image and the thumbnail size. The same image is therefore only
+resized once, no matter which project it belongs to.
+
+The images grid only requests the thumbnails of the images on its page. A few
+thumbnails are created in the request. More thumbnails, e.g., of all the images
+of a project when it is imported, are created by a pool of worker processes
+that is kept for the life of the process.
+
+The images of a Pollination project that is imported from a CSV file are only
+downloaded when they are requested, so their thumbnails are created the next
+time they are requested after the download.
+"""
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Iterable
+from PIL import Image
+
+from cache import cache_get, cache_set
+from config import app_path, thumbnail_path, thumbnail_size, \
+    thumbnail_workers, thumbnail_inline
+from helper import file_hash, temp_path
+from metrics import count_cache
+from registry import get_memo, get_project
+
+thumbnail_format = 'WEBP'
+thumbnail_suffix = '.webp'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def thumbnail_name(image_path: Path) -> str:
+    """Get the content-addressed file name of the thumbnail of an image."""
+    key = f'{file_hash(image_path)}:{thumbnail_size}'
+    return hashlib.sha256(key.encode()).hexdigest()[:32] + thumbnail_suffix
+
+
+def _create_thumbnail(image_path: Path, output_path: Path, size: int):
+    """Resize an image and write it to output_path.
+
+    The thumbnail is written to a temporary file first so that a partly written
+    thumbnail is never served.
+    """
+    with Image.open(image_path) as image:
+        image.thumbnail((size, size))
+        temp_file = temp_path(output_path)
+        image.save(temp_file, thumbnail_format, quality=80)
+    os.replace(temp_file, output_path)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Get the pool of worker processes of the thumbnails.
+
+    The workers are spawned, since forking a process with threads, e.g., a
+    gunicorn worker, is not safe. Spawning them is slow, so the pool is created
+    once and kept.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=thumbnail_workers,
+                mp_context=multiprocessing.get_context('spawn'))
+        return _executor
+
+
+def _reset_executor(executor: ProcessPoolExecutor):
+    """Drop a pool whose worker processes died, so the next one is new."""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False)
+
+
+def create_thumbnails(project_path: Path, images: Iterable[str]) -> Dict[str, str]:
+    """Create the thumbnails of the images in a project folder.
+
+    Return a dictionary from the image name to the file name of its thumbnail.
+    Thumbnails that already exist are not created again. Images that do not
+    exist are skipped.
+    """
+    thumbnail_path.mkdir(parents=True, exist_ok=True)
+    thumbnails = {}
+    missing = []
+    for image in images:
+        image_path = project_path.joinpath(image)
+        if image in thumbnails or not image_path.is_file():
+            continue
+        name = thumbnail_name(image_path)
+        thumbnails[image] = name
+        output_path = thumbnail_path.joinpath(name)
+        if not output_path.exists():
+            missing.append((image, image_path, output_path))
+
+    failed = []
+    if len(missing) > thumbnail_inline and thumbnail_workers > 1:
+        executor = _get_executor()
+        try:
+            futures = {
+                image: executor.submit(
+                    _create_thumbnail, image_path, output_path, thumbnail_size)
+                for image, image_path, output_path in missing
+            }
+            for image, future in futures.items():
+                if future.exception() is not None:
+                    failed.append(image)
+        except BrokenProcessPool:
+            _reset_executor(executor)
+            failed = [image for image, _, _ in missing]
+    else:
+        for image, image_path, output_path in missing:
+            try:
+                _create_thumbnail(image_path, output_path, thumbnail_size)
+            except Exception:
+                failed.append(image)
+
+    # the grid falls back to the full image if the thumbnail failed
+    for image in failed:
+        thumbnails.pop(image)
+
+    return thumbnails
+
+
+def get_thumbnails(
+        dataset_id: str, project_folder: str, images: Iterable[str]) -> Dict[str, str]:
+    """Get the thumbnails of images of a dataset.
+
+    The thumbnails are created the first time an image is requested and kept
+    with the dataset in the registry. The names of the thumbnails are also kept
+    in the shared cache, so the other workers do not hash the images again.
+    Images that do not exist yet, e.g., because they are downloaded on demand,
+    are looked up again the next time they are requested, so the images grid
+    only requests the images of its page.
+    """
+    memo = get_memo(dataset_id)
+    project_path = app_path.joinpath(project_folder)
+    key = ('thumbnails', dataset_id, get_project(dataset_id).source_stamp,
+           thumbnail_size)
+    if 'thumbnails' not in memo:
+        thumbnails = cache_get(key) or {}
+        if not all(thumbnail_path.joinpath(name).exists()
+                   for name in thumbnails.values()):
+            thumbnails = {}
+        memo['thumbnails'] = thumbnails
+    thumbnails = memo['thumbnails']
+    missing = [image for image in dict.fromkeys(images)
+               if image not in thumbnails]
+    count_cache('thumbnails', not missing)
+    if missing:
+        created = create_thumbnails(project_path, missing)
+        if created:
+            thumbnails = {**memo['thumbnails'], **created}
+            memo['thumbnails'] = thumbnails
+            cache_set(key, thumbnails)
+    return thumbnails
@@ -0,0 +1,256 @@
+"""Benchmarks of the callbacks of the app on synthetic studies.
+
+The callback functions are called directly, without a browser or a server, and
+every case is measured for latency, peak memory and the size of the response as
+Dash would serialize it, before and after compression. The results are written
+to benchmarks/results as a JSON file named after the current commit, so the
+results of two commits can be compared.
+
+Usage:
+    python benchmarks/run.py --rows 1000 10000 100000
+    python benchmarks/run.py --rows 1000 10000 --compare <commit>
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextvars import copy_context
+from pathlib import Path
+
+from synthetic import app_path, generate_study
+
+sys.path.insert(0, str(app_path))
+
+import plotly.io.json as pio_json  # noqa: E402
+from dash._callback_context import context_value  # noqa: E402
+from dash._utils import AttributeDict  # noqa: E402
+
+import registry  # noqa: E402
+from datafile import sidecar_path  # noqa: E402
+from serialization import init_serialization  # noqa: E402
+from serving import compress_body, compress_encodings  # noqa: E402
+from callbacks.color import update_color_by  # noqa: E402
+from callbacks.image import update_clicked_image_grid, update_images_grid  # noqa: E402
+from callbacks.records import update_active_records  # noqa: E402
+from callbacks.table import update_table_data  # noqa: E402
+from thumbnails import get_thumbnails  # noqa: E402
+
+results_path = Path(__file__).parent.joinpath('results')
+
+
+def call(function, *args, triggered: str = None):
+    """Call a callback function with a callback context, so ctx.triggered_id
+    works like in a request."""
+    def run():
+        triggered_inputs = [{'prop_id': triggered, 'value': None}] \
+            if triggered else []
+        context_value.set(AttributeDict(triggered_inputs=triggered_inputs))
+        return function(*args)
+    return copy_context().run(run)
+
+
+def response_size(response) -> int:
+    """Get the size in bytes of a response serialized like Dash does."""
+    return len(pio_json.to_json_plotly(response).encode())
+
+
+def compressed_size(response) -> int:
+    """Get the size in bytes of a response after it is compressed like the
+    server does, without the threshold of COMPRESS_MIN_SIZE."""
+    body = pio_json.to_json_plotly(response).encode()
+    return len(compress_body(body, compress_encodings[0]))
+
+
+def measure(function, repeat: int, setup=None) -> dict:
+    """Measure the latency, the peak memory and the response size of function.
+
+    setup is called before every call and is not measured.
+    """
+    latencies = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        response = function()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'latency_ms': {
+            'median': round(statistics.median(latencies), 3),
+            'min': round(min(latencies), 3)
+        },
+        'peak_memory_kib': round(peak / 1024, 1),
+        'response_bytes': response_size(response),
+        'compressed_bytes': compressed_size(response)
+    }
+
+
+def study_cases(csv_path: Path):
+    """Get the cases of a study as (name, function, setup) tuples."""
+    dataset_id = registry.dataset_id_from_path(csv_path)
+
+    def forget_project():
+        registry._projects.pop(dataset_id)
+
+    def forget_sidecar():
+        forget_project()
+        sidecar_path(csv_path).unlink(missing_ok=True)
+
+    def load():
+        bundle = registry.load_project(csv_path)
+        if bundle.img_column:
+            get_thumbnails(dataset_id, bundle.project_folder,
+                           bundle.frame[bundle.img_column])
+        # what the loader callbacks send to the browser for the project
+        return (bundle.dataset_id, bundle.labels, bundle.parameters,
+                bundle.figure, bundle.columns)
+
+    yield 'load_project (csv)', load, forget_sidecar
+    yield 'load_project (sidecar)', load, forget_project
+    yield 'load_project (memory)', load, None
+
+    bundle = registry.load_project(csv_path)
+    df = bundle.frame
+    inputs = [p for p, v in bundle.parameters.items() if v['type'] == 'in']
+    outputs = [p for p, v in bundle.parameters.items() if v['type'] == 'out']
+    # a brush over the middle of an input and of an output
+    filters = {}
+    for col in (inputs[:1] + outputs[:1]):
+        low, high = df[col].quantile([0.2, 0.8])
+        filters[col] = [[float(low), float(high)]]
+    active_records = call(update_active_records, filters, dataset_id)
+    narrower = dict(filters)
+    col = outputs[0] if outputs else inputs[0]
+    narrower[col] = [[float(df[col].quantile(0.3)), float(df[col].quantile(0.8))]]
+    narrower_records = call(update_active_records, narrower, dataset_id)
+
+    yield 'update_active_records', \
+        lambda: call(update_active_records, filters, dataset_id), None
+
+    yield 'update_table_data', lambda: call(
+        update_table_data, active_records, dataset_id, 0, [],
+        triggered='active-records.data'), None
+
+    color_by = outputs[-1] if outputs else inputs[-1]
+    figure = bundle.figure.to_dict()
+    yield 'update_color_by', lambda: call(
+        update_color_by, [1], dataset_id, bundle.labels, figure,
+        triggered=json.dumps({'color_by_dropdown': color_by}) + '.n_clicks'), \
+        None
+
+    if not bundle.img_column:
+        return
+
+    def images_grid(records, grid_rows=None, color=bundle.color_by,
+                    triggered='active-records.data'):
+        return call(
+            update_images_grid, records, dataset_id, color, None, 1,
+            bundle.sort_by, False, bundle.img_column, bundle.project_folder,
+            bundle.labels, grid_rows, triggered=triggered)
+
+    grid_rows = images_grid(active_records)[-1]
+    yield 'update_images_grid (full)', \
+        lambda: images_grid(active_records), None
+    yield 'update_images_grid (patch)', \
+        lambda: images_grid(narrower_records, grid_rows), None
+    yield 'update_images_grid (color)', lambda: images_grid(
+        active_records, grid_rows, color_by, 'color-by-column.data'), None
+
+    image = df[bundle.img_column].iloc[len(df) // 2]
+    yield 'update_clicked_image_grid', lambda: call(
+        update_clicked_image_grid, image, dataset_id, bundle.labels,
+        bundle.img_column, bundle.parameters, bundle.project_folder), None
+
+
+def git_commit() -> str:
+    """Get the short hash of the current commit, with a suffix if the working
+    tree has changes."""
+    def git(*args):
+        return subprocess.run(
+            ['git', *args], cwd=app_path, capture_output=True, text=True
+        ).stdout.strip()
+    commit = git('rev-parse', '--short', 'HEAD') or 'unknown'
+    if git('status', '--porcelain', '--untracked-files=no'):
+        commit += '-dirty'
+    return commit
+
+
+def run(rows_list, inputs, outputs, images, repeat) -> dict:
+    results = []
+    for rows in rows_list:
+        csv_path = generate_study(rows, inputs, outputs, images)
+        for name, function, setup in study_cases(csv_path):
+            result = {'case': name, 'rows': rows, **measure(function, repeat, setup)}
+            results.append(result)
+            print(f'{rows:>9} {name:<30} '
+                  f'{result["latency_ms"]["median"]:>10.2f} ms '
+                  f'{result["peak_memory_kib"]:>10.1f} KiB '
+                  f'{result["response_bytes"]:>10} B '
+                  f'{result["compressed_bytes"]:>10} B')
+    return {
+        'commit': git_commit(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'study': {'inputs': inputs, 'outputs': outputs, 'images': images},
+        'repeat': repeat,
+        'results': results
+    }
+
+
+def compare(current: dict, baseline: dict):
+    """Print the latency and the response size of current relative to
+    baseline."""
+    base = {(r['case'], r['rows']): r for r in baseline['results']}
+    print(f'\n{current["commit"]} compared to {baseline["commit"]}')
+    for result in current['results']:
+        other = base.get((result['case'], result['rows']))
+        if other is None:
+            continue
+        latency = result['latency_ms']['median'] / \
+            max(other['latency_ms']['median'], 1e-6)
+        size = result['response_bytes'] / max(other['response_bytes'], 1)
+        print(f'{result["rows"]:>9} {result["case"]:<30} '
+              f'latency x{latency:>6.2f}  response x{size:>6.2f}')
+
+
+def main():
+    # the responses are serialized like in the app
+    init_serialization()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--inputs', type=int, default=4)
+    parser.add_argument('--outputs', type=int, default=4)
+    parser.add_argument('--no-images', action='store_true')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument(
+        '--compare', help='commit or path of the results to compare with')
+    args = parser.parse_args()
+
+    current = run(args.rows, args.inputs, args.outputs, not args.no_images,
+                  args.repeat)
+    results_path.mkdir(exist_ok=True)
+    output = results_path.joinpath(f'{current["commit"]}.json')
+    output.write_text(json.dumps(current, indent=2))
+    print(f'\nresults written to {output}')
+
+    if args.compare:
+        baseline = Path(args.compare)
+        if not baseline.is_file():
+            baseline = results_path.joinpath(f'{args.compare}.json')
+        compare(current, json.loads(baseline.read_text()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Generator of synthetic design-space studies for the benchmarks.
+
+A study is a data.csv file with in:, out: and img: columns, like the samples of
+the app, and placeholder PNG images. Every row gets its own image name but only
+the first image_files images are written, so large studies stay small on disk.
+The missing images exercise the fallback to the full image in the grid.
+
+Usage:
+    python benchmarks/synthetic.py --rows 100000 --inputs 6 --outputs 4
+"""
+import argparse
+import struct
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+app_path = Path(__file__).resolve().parents[1].joinpath('app')
+# the app only loads datasets from the samples folder or the pollination folder
+studies_path = app_path.joinpath('pollination', 'benchmarks')
+
+image_size = 64
+
+
+def png_bytes(color, size: int = image_size) -> bytes:
+    """Get the bytes of a PNG image of one color."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + \
+            struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+    row = b'\x00' + bytes(color) * size
+    header = struct.pack('>IIBBBBB', size, size, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + \
+        chunk(b'IDAT', zlib.compress(row * size)) + chunk(b'IEND', b'')
+
+
+def study_name(rows: int, inputs: int, outputs: int, images: bool) -> str:
+    """Get the name of the folder of a study."""
+    return f'rows_{rows}_in_{inputs}_out_{outputs}{"_img" if images else ""}'
+
+
+def generate_frame(
+        rows: int, inputs: int, outputs: int, images: bool = True,
+        seed: int = 0) -> pd.DataFrame:
+    """Generate the DataFrame of a study.
+
+    The inputs are sampled from a few discrete levels, like a parametric sweep,
+    and the outputs are noisy functions of the inputs, so filters and sorts
+    behave like they do on a real study.
+    """
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(inputs):
+        levels = np.linspace(0, 10, 3 + i % 5)
+        data[f'in:param_{i}'] = rng.choice(levels, size=rows)
+    x = np.column_stack(list(data.values())) if data else np.zeros((rows, 1))
+    for i in range(outputs):
+        weights = rng.normal(size=x.shape[1])
+        data[f'out:metric_{i}'] = np.round(
+            x @ weights + rng.normal(scale=2, size=rows), 4)
+    if images:
+        data['img:image'] = [f'design_{row}.png' for row in range(rows)]
+    return pd.DataFrame(data)
+
+
+def generate_study(
+        rows: int, inputs: int = 4, outputs: int = 4, images: bool = True,
+        image_files: int = 1000, folder: Path = None,
+        overwrite: bool = False) -> Path:
+    """Generate a study and get the path of its data.csv file.
+
+    An existing study is kept unless overwrite is True.
+    """
+    folder = Path(folder or studies_path.joinpath(
+        study_name(rows, inputs, outputs, images)))
+    csv_path = folder.joinpath('data.csv')
+    if csv_path.exists() and not overwrite:
+        return csv_path
+
+    folder.mkdir(parents=True, exist_ok=True)
+    df = generate_frame(rows, inputs, outputs, images)
+    if images:
+        for row in range(min(rows, image_files)):
+            color = (row % 256, (row // 256) % 256, (row * 7) % 256)
+            folder.joinpath(f'design_{row}.png').write_bytes(png_bytes(color))
+    df.to_csv(csv_path, index=False)
+    return csv_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000])
+    parser.add_argument('--inputs', type=int, default=4)
+    parser.add_argument('--outputs', type=int, default=4)
+    parser.add_argument('--no-images', action='store_true')
+    parser.add_argument('--image-files', type=int, default=1000)
+    parser.add_argument('--overwrite', action='store_true')
+    args = parser.parse_args()
+    for rows in args.rows:
+        csv_path = generate_study(
+            rows, args.inputs, args.outputs, not args.no_images,
+            args.image_files, overwrite=args.overwrite)
+        print(csv_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Configuration of the tests.
+
+The modules of the app import each other by name, so the app folder is added to
+the path. The shared cache, the locks and the thumbnails of the app are written
+to a temporary folder instead of the app folder. The downloads are tested
+against a local stub of the artifact service.
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+import pytest
+
+_temp_folder = Path(tempfile.mkdtemp(prefix='design-explorer-tests-'))
+os.environ.setdefault('CACHE_PATH', _temp_folder.joinpath('cache').as_posix())
+os.environ.setdefault(
+    'THUMBNAIL_PATH', _temp_folder.joinpath('thumbnails').as_posix())
+
+sys.path.insert(0, Path(__file__).resolve().parents[1].joinpath('app').as_posix())
+
+
+class ArtifactService:
+    """A local stub of the artifact service of the Pollination API.
+
+    The download endpoint returns a signed URL of the file, like the API does,
+    and the signed URL serves the content of the file.
+
+    files: The content of the files keyed by the artifact path.
+    failures: The number of times the signed URL of a file fails with a 503
+        error before it succeeds, keyed by the artifact path.
+    delay: The time in seconds a signed URL waits before it responds.
+    requests: The artifact paths that were requested from the download
+        endpoint.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.failures = {}
+        self.delay = 0
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.url = f'http://127.0.0.1:{self._server.server_port}'
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def _handler(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path.endswith('/artifacts/download'):
+                    path = parse_qs(url.query)['path'][0]
+                    with service._lock:
+                        service.requests.append(path)
+                    if path not in service.files:
+                        return self._send(404, b'{"detail": "not found"}')
+                    signed_url = json.dumps(
+                        f'{service.url}/signed/{quote(path)}')
+                    return self._send(200, signed_url.encode())
+                if url.path.startswith('/signed/'):
+                    path = unquote(url.path[len('/signed/'):])
+                    time.sleep(service.delay)
+                    with service._lock:
+                        failures = service.failures.get(path, 0)
+                        if failures:
+                            service.failures[path] = failures - 1
+                    if failures:
+                        return self._send(503, b'unavailable')
+                    return self._send(200, service.files[path])
+                return self._send(404, b'')
+
+            def _send(self, status, body):
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def artifact_service():
+    service = ArtifactService()
+    yield service
+    service.close()
@@ -0,0 +1,15 @@
+"""Tests of the cache that is shared by the worker processes."""
+import stat
+
+from cache import cache_get, cache_set, private_folder
+from config import cache_path
+
+
+def test_cache_folders_are_private():
+    cache_path.mkdir(mode=0o755, parents=True, exist_ok=True)
+    cache_path.chmod(0o755)
+    folder = private_folder(cache_path.joinpath('test-private'))
+    cache_set('test-private', 'key')
+    assert cache_get('test-private') == 'key'
+    for path in (cache_path, folder, cache_path.joinpath('shared')):
+        assert stat.S_IMODE(path.stat().st_mode) == 0o700
@@ -0,0 +1,137 @@
+"""Tests of the downloads of the artifacts of a Pollination project against a
+local stub of the artifact service."""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import downloader
+from cache import cache_get_expiring
+from downloader import RemoteFolder, create_session, download_artifact, \
+    download_artifacts, download_url, fetch_on_demand, register_remote_folder
+
+
+def temp_files(folder):
+    return [path.name for path in folder.rglob('.*')]
+
+
+def test_download_artifact(artifact_service, tmp_path):
+    artifact_service.files['results/a.png'] = b'image a'
+    output_path = tmp_path.joinpath('a.png')
+    with create_session() as session:
+        download_artifact(
+            session, download_url('owner', 'project', artifact_service.url),
+            {}, 'results/a.png', output_path)
+    assert output_path.read_bytes() == b'image a'
+    # the .part file is renamed when the download is done
+    assert temp_files(tmp_path) == []
+
+
+def test_download_artifact_retries(artifact_service, tmp_path):
+    artifact_service.files['results/a.png'] = b'image a'
+    artifact_service.failures['results/a.png'] = 2
+    output_path = tmp_path.joinpath('a.png')
+    with create_session() as session:
+        download_artifact(
+            session, download_url('owner', 'project', artifact_service.url),
+            {}, 'results/a.png', output_path)
+    assert output_path.read_bytes() == b'image a'
+    assert artifact_service.failures['results/a.png'] == 0
+
+
+def test_download_artifacts(artifact_service, tmp_path):
+    for name in ('a.png', 'b.png', 'sub/c.png'):
+        artifact_service.files[f'results/{name}'] = name.encode()
+    # a file that keeps failing after the retries and a file that is missing
+    artifact_service.files['results/d.png'] = b'd.png'
+    artifact_service.failures['results/d.png'] = 100
+    progress = []
+
+    failed = download_artifacts(
+        'key', 'owner', 'project', 'results',
+        ['a.png', 'b.png', 'sub/c.png', 'd.png', 'missing.png', 'a.png'],
+        tmp_path, host=artifact_service.url,
+        on_progress=lambda count, total: progress.append((count, total)))
+
+    assert sorted(failed) == ['d.png', 'missing.png']
+    for name in ('a.png', 'b.png', 'sub/c.png'):
+        assert tmp_path.joinpath(name).read_bytes() == name.encode()
+    assert not tmp_path.joinpath('d.png').exists()
+    assert not tmp_path.joinpath('missing.png').exists()
+    assert temp_files(tmp_path) == []
+    # duplicates are downloaded once
+    assert progress[-1] == (5, 5)
+    assert artifact_service.requests.count('results/a.png') == 1
+
+
+@pytest.fixture
+def remote_folder(artifact_service, tmp_path, monkeypatch):
+    """Register a remote folder for the local folder owner/project/results in
+    a temporary pollination folder."""
+    monkeypatch.setattr(downloader, 'pollination_path', tmp_path)
+    local_folder = f'owner/{tmp_path.name}/results'
+    artifact_service.files.update({
+        'results/a.png': b'image a',
+        'results/sub/b.png': b'image b',
+        'results/secret.txt': b'secret',
+        'results/sub/secret.txt': b'secret',
+    })
+    register_remote_folder(local_folder, RemoteFolder(
+        'key', 'owner', 'project', 'results', host=artifact_service.url,
+        images=frozenset(['a.png', './sub/b.png', 'missing.png'])))
+    yield local_folder
+    downloader._remote_folders.clear()
+
+
+def test_fetch_on_demand(artifact_service, remote_folder, tmp_path):
+    assert fetch_on_demand(f'{remote_folder}/a.png')
+    assert fetch_on_demand(f'{remote_folder}/sub/b.png')
+    assert tmp_path.joinpath(remote_folder, 'sub/b.png').read_bytes() == b'image b'
+    # the file exists, so it is not requested again
+    assert fetch_on_demand(f'{remote_folder}/a.png')
+    assert artifact_service.requests == ['results/a.png', 'results/sub/b.png']
+
+
+def test_fetch_on_demand_other_worker(artifact_service, remote_folder):
+    # a worker that did not import the project finds it in the shared cache
+    downloader._remote_folders.clear()
+    assert fetch_on_demand(f'{remote_folder}/a.png')
+
+
+def test_fetch_on_demand_only_images(artifact_service, remote_folder):
+    for path in ('secret.txt', 'sub/secret.txt', 'sub', '../results/secret.txt'):
+        assert not fetch_on_demand(f'{remote_folder}/{path}')
+    assert not fetch_on_demand('owner/other/a.png')
+    assert artifact_service.requests == []
+
+
+def test_fetch_on_demand_miss_is_cached(artifact_service, remote_folder):
+    assert not fetch_on_demand(f'{remote_folder}/missing.png')
+    assert not fetch_on_demand(f'{remote_folder}/missing.png')
+    assert artifact_service.requests == ['results/missing.png']
+
+
+def test_fetch_on_demand_concurrent(artifact_service, remote_folder, tmp_path):
+    artifact_service.delay = 0.3
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        results = list(executor.map(
+            fetch_on_demand, [f'{remote_folder}/a.png'] * 10))
+    assert all(results)
+    assert artifact_service.requests == ['results/a.png']
+    assert tmp_path.joinpath(remote_folder, 'a.png').read_bytes() == b'image a'
+
+
+def test_remote_folder_expires(artifact_service, remote_folder, monkeypatch):
+    # the API key of the user is only kept in the shared cache with an expiry
+    value, expire_time = cache_get_expiring(('remote_folder', remote_folder))
+    assert value is not None
+    assert expire_time <= time.time() + downloader.remote_folder_ttl
+
+    monkeypatch.setattr(downloader, 'remote_folder_ttl', 1)
+    register_remote_folder(remote_folder, RemoteFolder(
+        'key', 'owner', 'project', 'results', host=artifact_service.url,
+        images=frozenset(['a.png', 'sub/b.png'])))
+    time.sleep(1.1)
+    assert not fetch_on_demand(f'{remote_folder}/a.png')
+    assert cache_get_expiring(('remote_folder', remote_folder)) == (None, None)
+    assert artifact_service.requests == []
@@ -0,0 +1,60 @@
+"""Tests of the stratified sample of the parallel coordinates figure."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from figures import sample_rows
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(1)
+    rows = 10007
+    return pd.DataFrame({
+        'in:x': rng.choice([0.0, 2.5, 5.0], size=rows),
+        'in:y': rng.normal(size=rows),
+        'out:z': rng.lognormal(size=rows),
+        'img:image': [f'design_{row}.png' for row in range(rows)],
+    })
+
+
+def _extremes(df):
+    numeric = df.select_dtypes('number')
+    return set(numeric.to_numpy().argmin(axis=0)) | \
+        set(numeric.to_numpy().argmax(axis=0))
+
+
+def test_small_studies_are_not_sampled(df):
+    assert sample_rows(df, 'out:z', max_rows=len(df)) is None
+
+
+@pytest.mark.parametrize('max_rows', [1, 50, 1000, 5000])
+def test_sample_stays_within_max_rows(df, max_rows):
+    rows = sample_rows(df, 'out:z', max_rows=max_rows)
+    extremes = _extremes(df)
+    assert len(rows) <= max(max_rows, len(extremes))
+    assert len(set(rows) - extremes) <= max_rows
+    assert np.all(np.diff(rows) > 0)
+
+
+def test_sample_keeps_the_extremes_of_each_column(df):
+    rows = sample_rows(df, 'out:z', max_rows=100)
+    assert _extremes(df) <= set(rows)
+    sample = df.iloc[rows]
+    for column in ('in:x', 'in:y', 'out:z'):
+        assert sample[column].min() == df[column].min()
+        assert sample[column].max() == df[column].max()
+
+
+def test_sample_is_deterministic(df):
+    first = sample_rows(df, 'out:z', max_rows=1000)
+    second = sample_rows(df.copy(), 'out:z', max_rows=1000)
+    np.testing.assert_array_equal(first, second)
+
+
+def test_sample_preserves_the_distribution_of_the_colors(df):
+    rows = sample_rows(df, 'out:z', max_rows=1000)
+    quantiles = [0.1, 0.5, 0.9]
+    np.testing.assert_allclose(
+        df['out:z'].iloc[rows].quantile(quantiles),
+        df['out:z'].quantile(quantiles), rtol=0.15)
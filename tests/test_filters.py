@@ -0,0 +1,80 @@
+"""Tests of the filters of the active records."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from filters import filter_indices
+from indexes import build_indexes
+
+
+@pytest.fixture(scope='module')
+def df():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({
+        'in:x': rng.choice([0.0, 2.5, 5.0, 7.5, 10.0], size=500),
+        'in:y': rng.uniform(0, 10, size=500),
+        'out:z': rng.normal(5, 2, size=500),
+    })
+    # missing values never pass a selection
+    data.loc[rng.choice(500, size=40, replace=False), 'out:z'] = np.nan
+    data.loc[rng.choice(500, size=20, replace=False), 'in:y'] = np.nan
+    return data
+
+
+def pandas_indices(df, active_filters):
+    """Get the positions of the rows that pass the filters with a plain pandas
+    mask: ranges are combined with OR within a column and columns with AND."""
+    mask = pd.Series(True, index=df.index)
+    selected = False
+    for col, selection in active_filters.items():
+        if not selection:
+            continue
+        ranges = np.asarray(selection, dtype=float).reshape(-1, 2)
+        col_mask = pd.Series(False, index=df.index)
+        for low, high in ranges:
+            col_mask |= df[col].between(min(low, high), max(low, high))
+        mask &= col_mask
+        selected = True
+    if not selected:
+        return None
+    return np.flatnonzero(mask.to_numpy())
+
+
+cases = {
+    'single range': {'in:y': [[2.0, 6.0]]},
+    'reversed range': {'in:y': [[6.0, 2.0]]},
+    'range on discrete values': {'in:x': [[2.5, 7.5]]},
+    'multiple ranges': {'out:z': [[[1.0, 3.0], [6.0, 8.0]]]},
+    'overlapping ranges': {'out:z': [[[1.0, 5.0], [4.0, 6.0], [4.5, 4.6]]]},
+    'several columns': {'in:x': [[0.0, 5.0]], 'in:y': [[1.0, 9.0]],
+                        'out:z': [[[2.0, 4.0], [5.0, 7.0]]]},
+    'removed selection': {'in:x': None, 'in:y': [[3.0, 4.0]]},
+    'removed and empty selections': {'in:x': None, 'out:z': []},
+    'empty result': {'in:y': [[2.0, 3.0]], 'out:z': [[100.0, 200.0]]},
+}
+
+
+@pytest.mark.parametrize('active_filters', cases.values(), ids=cases.keys())
+@pytest.mark.parametrize('indexed', [False, True], ids=['scan', 'index'])
+def test_filter_indices_matches_pandas(df, active_filters, indexed):
+    indexes = build_indexes(df) if indexed else None
+    expected = pandas_indices(df, active_filters)
+    indices = filter_indices(df, active_filters, indexes)
+    if expected is None:
+        assert indices is None
+    else:
+        np.testing.assert_array_equal(indices, expected)
+
+
+@pytest.mark.parametrize('active_filters', cases.values(), ids=cases.keys())
+def test_index_matches_scan(df, active_filters):
+    scan = filter_indices(df, active_filters)
+    indexed = filter_indices(df, active_filters, build_indexes(df))
+    if scan is None:
+        assert indexed is None
+    else:
+        np.testing.assert_array_equal(indexed, scan)
+
+
+def test_no_filters(df):
+    assert filter_indices(df, {}) is None
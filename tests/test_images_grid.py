@@ -0,0 +1,44 @@
+"""Tests of the updates of the images grid."""
+from dash import Patch
+
+from callbacks.image import images_grid_patch
+
+
+def create_children(rows):
+    return [{'row': row} for row in rows]
+
+
+def apply(children, patch):
+    """Apply the operations of a Patch of a list like the browser does."""
+    children = list(children)
+    for operation in patch.to_plotly_json()['operations']:
+        if operation['operation'] == 'Delete':
+            del children[operation['location'][0]]
+        elif operation['operation'] == 'Insert':
+            children.insert(operation['params']['index'],
+                            operation['params']['value'])
+        elif operation['operation'] == 'Reverse':
+            children.reverse()
+    return children
+
+
+def test_small_change_is_a_patch():
+    previous = list(range(100))
+    page = [row for row in previous if row % 10] + [100, 101]
+    patch = images_grid_patch(previous, page, create_children)
+    assert isinstance(patch, Patch)
+    assert apply(create_children(previous), patch) == create_children(page)
+
+
+def test_large_change_sends_the_page():
+    previous = list(range(100))
+    page = list(range(60, 160))
+    assert images_grid_patch(previous, page, create_children) == \
+        create_children(page)
+
+
+def test_reversed_page():
+    previous = list(range(100))
+    patch = images_grid_patch(previous, previous[::-1], create_children)
+    assert apply(create_children(previous), patch) == \
+        create_children(previous[::-1])
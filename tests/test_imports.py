@@ -0,0 +1,76 @@
+"""Tests of the temporary files of the imports."""
+import os
+import zipfile
+from io import BytesIO
+
+import psutil
+import pytest
+
+from helper import remove_stale_temp_files
+from imports import extract_zip
+
+
+def _zip(files):
+    content = BytesIO()
+    with zipfile.ZipFile(content, 'w') as zip_file:
+        for name, data in files.items():
+            zip_file.writestr(name, data)
+    return content.getvalue()
+
+
+def _dead_pid():
+    pid = max(psutil.pids()) + 1000
+    assert not psutil.pid_exists(pid)
+    return pid
+
+
+def test_extract_zip_replaces_folder(tmp_path):
+    folder = tmp_path.joinpath('results')
+    extract_zip(_zip({'data.csv': 'a\n1\n', 'img/1.png': 'x'}), folder)
+    files = extract_zip(_zip({'data.csv': 'a\n2\n'}), folder)
+    assert files == ['data.csv']
+    assert folder.joinpath('data.csv').read_text() == 'a\n2\n'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['results']
+
+
+def test_failed_extract_zip_leaves_no_temp_folder(tmp_path, monkeypatch):
+    folder = tmp_path.joinpath('results')
+    extract_zip(_zip({'data.csv': 'a\n1\n'}), folder)
+
+    def extractall(self, path):
+        os.makedirs(path)
+        open(os.path.join(path, 'data.csv'), 'w').close()
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(zipfile.ZipFile, 'extractall', extractall)
+    with pytest.raises(KeyboardInterrupt):
+        extract_zip(_zip({'data.csv': 'a\n2\n'}), folder)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['results']
+    assert folder.joinpath('data.csv').read_text() == 'a\n1\n'
+
+
+def test_stale_temp_files_are_removed(tmp_path):
+    folder = tmp_path.joinpath('results')
+    folder.joinpath('img').mkdir(parents=True)
+    dead, alive = _dead_pid(), os.getpid()
+    stale = [
+        tmp_path.joinpath(f'.results.{dead}.1'),
+        tmp_path.joinpath(f'.results.{dead}.1.old'),
+        folder.joinpath('img', f'.1.png.{dead}.2.part'),
+        folder.joinpath(f'.data.csv.{dead}.3'),
+        folder.joinpath(f'..data.csv.arrow.{dead}.4'),
+    ]
+    kept = [
+        tmp_path.joinpath(f'.results.{alive}.1'),
+        folder.joinpath('img', f'.1.png.{alive}.2.part'),
+        folder.joinpath('img', '1.png'),
+        folder.joinpath('.manifest.json'),
+    ]
+    for path in stale[:2]:
+        path.joinpath('img').mkdir(parents=True)
+    for path in stale[2:] + kept:
+        path.touch()
+
+    remove_stale_temp_files(folder)
+    assert not any(path.exists() for path in stale)
+    assert all(path.exists() for path in kept)
@@ -0,0 +1,32 @@
+"""Tests of the locks that are shared by the worker processes."""
+import threading
+import time
+
+from locks import file_lock, lock_path, lock_stripes
+
+
+def test_striped_locks_share_a_fixed_number_of_files():
+    for i in range(1000):
+        with file_lock(f'test-striped:{i}', striped=True):
+            pass
+    stripes = list(lock_path.glob('stripe-*.lock'))
+    assert 0 < len(stripes) <= lock_stripes
+
+
+def test_file_lock_is_exclusive():
+    inside = []
+    overlaps = []
+
+    def hold():
+        with file_lock('test-exclusive', striped=True):
+            inside.append(1)
+            time.sleep(0.005)
+            overlaps.append(len(inside))
+            inside.pop()
+
+    threads = [threading.Thread(target=hold) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(overlaps) == 1
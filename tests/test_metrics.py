@@ -0,0 +1,25 @@
+"""Tests of the metrics of the app."""
+from flask import Flask
+
+from config import assets_path
+from metrics import cache_requests
+from registry import dataset_id_from_path, get_dataset, get_indexes, get_memo
+
+
+def _projects_lookups():
+    return sum(value for _, _, labels, value in cache_requests.samples()
+               if labels[0] == 'projects')
+
+
+def test_project_lookups_are_counted_once_per_request():
+    dataset_id = dataset_id_from_path(
+        assets_path.joinpath('samples', 'box', 'data.csv'))
+    before = _projects_lookups()
+    with Flask(__name__).test_request_context():
+        get_dataset(dataset_id)
+        get_indexes(dataset_id)
+        get_memo(dataset_id)
+    assert _projects_lookups() == before + 1
+    with Flask(__name__).test_request_context():
+        get_dataset(dataset_id)
+    assert _projects_lookups() == before + 2
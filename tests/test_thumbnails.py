@@ -0,0 +1,63 @@
+"""Tests of the thumbnails of the images grid."""
+import sys
+from pathlib import Path
+
+import pytest
+
+import config
+import registry
+import thumbnails
+from config import thumbnail_path
+from registry import load_project
+from thumbnails import get_thumbnails
+
+sys.path.insert(0, Path(__file__).resolve().parents[1].joinpath('benchmarks').as_posix())
+from synthetic import generate_study, png_bytes  # noqa: E402
+
+
+@pytest.fixture
+def study(tmp_path, monkeypatch):
+    """A synthetic study in a temporary app folder."""
+    pollination_path = tmp_path.joinpath('pollination')
+    for module in (config, registry, thumbnails):
+        monkeypatch.setattr(module, 'app_path', tmp_path)
+    for module in (config, registry):
+        monkeypatch.setattr(module, 'pollination_path', pollination_path)
+    return generate_study(
+        8, inputs=1, outputs=1, image_files=8,
+        folder=pollination_path.joinpath('test_thumbnails'))
+
+
+def test_thumbnails_of_downloaded_images(study):
+    """The thumbnails of images that do not exist yet, like the images of a
+    project that are downloaded on demand, are created once they exist."""
+    folder = study.parent
+    for row in range(4, 8):
+        folder.joinpath(f'design_{row}.png').unlink()
+    bundle = load_project(study)
+    images = bundle.frame[bundle.img_column]
+
+    thumbnails = get_thumbnails(bundle.dataset_id, bundle.project_folder, images)
+    assert sorted(thumbnails) == [f'design_{row}.png' for row in range(4)]
+
+    # the images are downloaded
+    for row in range(4, 8):
+        folder.joinpath(f'design_{row}.png').write_bytes(png_bytes((row, 0, 0)))
+    thumbnails = get_thumbnails(bundle.dataset_id, bundle.project_folder, images)
+    assert sorted(thumbnails) == sorted(images)
+    assert all(thumbnail_path.joinpath(name).exists()
+               for name in thumbnails.values())
+
+
+def test_thumbnails_of_a_page(study, monkeypatch):
+    """Only the requested images are looked up, and a page of thumbnails is
+    created in the request instead of by the worker processes."""
+    def no_executor():
+        raise AssertionError('the pool of worker processes was used')
+
+    monkeypatch.setattr(thumbnails, '_get_executor', no_executor)
+    bundle = load_project(study)
+    page = bundle.frame[bundle.img_column].iloc[2:5].tolist()
+
+    names = get_thumbnails(bundle.dataset_id, bundle.project_folder, page)
+    assert sorted(names) == sorted(page)